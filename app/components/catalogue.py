@@ -0,0 +1,207 @@
+# import
+import hashlib
+import time
+
+import numpy as np
+from sqlalchemy import select, update
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from components.classement import appliquer_commandes, par_lots
+from components.crud import _valider
+from components.models import Commande, EmpreinteProduit, Genre, Platform, Produit, Publisher, Year
+from components.routeur import en_ecriture
+
+
+# Clé naturelle d'un produit et attributs importés (colonnes de vgsales.csv)
+COLONNES_CLE = ("Name", "Platform", "Year", "Publisher")
+COLONNES_ATTRIBUTS = ("Genre",)
+
+# Colonne CSV -> (table de dimension, colonne nom, colonne code, colonne de Produit)
+DIMENSIONS = {
+    "Genre": (Genre, Genre.genre_nom, Genre.genre_cod, "genre_cod"),
+    "Platform": (Platform, Platform.platform_nom, Platform.platform_cod, "platform_cod"),
+    "Publisher": (Publisher, Publisher.publisher_nom, Publisher.publisher_cod, "publisher_cod"),
+    "Year": (Year, Year.year_nom, Year.year_cod, "year_n"),
+}
+
+# Le notebook de création enregistre dans `produits` l'indice de la valeur dans sa liste (à partir de 0),
+# alors que les tables de dimension sont numérotées à partir de 1 : code produit = code de la table - 1.
+DECALAGE_CODES = 1
+
+
+def lire_catalogue(path_csv):
+    """Lit vgsales.csv comme le notebook de création (valeurs manquantes -> "unknown", texte)
+    et calcule pour chaque ligne le hash de la clé naturelle et l'empreinte des attributs.
+
+    Returns:
+        pandas.DataFrame: Colonnes du CSV en texte, plus `cle` et `empreinte`.
+            Les doublons de clé naturelle sont retirés (première occurrence conservée).
+    """
+    import pandas as pd
+
+    df = pd.read_csv(path_csv)
+    df = df.fillna("unknown")
+    colonnes = list(COLONNES_CLE) + list(COLONNES_ATTRIBUTS)
+    df[colonnes] = df[colonnes].astype(str)
+
+    df["cle"] = _hacher(df, COLONNES_CLE)
+    df["empreinte"] = _hacher(df, COLONNES_CLE + COLONNES_ATTRIBUTS)
+    return df.drop_duplicates("cle", keep="first")
+
+
+def _hacher(df, colonnes):
+    colonnes = list(colonnes)
+    valeurs = df[colonnes[0]].str.cat([df[c] for c in colonnes[1:]], sep="\x1f")
+    return [hashlib.blake2b(v.encode("utf-8"), digest_size=16).hexdigest() for v in valeurs]
+
+
+@en_ecriture
+def amorcer_empreintes(session: Session, path_csv, commit=True):
+    """Crée les empreintes des produits existants à partir du CSV qui a servi à créer la base.
+
+    Le notebook de création insère les produits dans l'ordre du CSV : la ligne i a le produit_id i + 1.
+    Une ligne n'est retenue que si le nom du produit correspond.
+
+    Args:
+        path_csv (str): CSV d'origine de la base.
+        commit (bool, optional): Si False, simple flush ; l'appelant valide.
+
+    Returns:
+        int: Nombre d'empreintes créées.
+    """
+    import pandas as pd
+
+    df = lire_catalogue(path_csv)
+    df["produit_id"] = df.index + 1
+    noms = pd.read_sql(select(Produit.produit_id, Produit.name), session.connection())
+    df = df.merge(noms, on="produit_id")
+    df = df[df["name"] == df["Name"]]
+
+    lignes = df[["produit_id", "cle", "empreinte"]].to_dict(orient="records")
+    for lot in par_lots(lignes):
+        session.execute(insert(EmpreinteProduit).on_conflict_do_nothing(), lot)
+    _valider(session, commit)
+    return len(lignes)
+
+
+def _empreintes(session):
+    lignes = session.execute(
+        select(EmpreinteProduit.cle, EmpreinteProduit.produit_id, EmpreinteProduit.empreinte)
+    ).all()
+    return {cle: (produit_id, empreinte) for cle, produit_id, empreinte in lignes}
+
+
+@en_ecriture
+def importer_catalogue(session: Session, path_csv, reference=None, dry_run=False):
+    """Import incrémental de vgsales.csv : n'écrit que les lignes nouvelles ou modifiées.
+
+    Chaque ligne est identifiée par le hash de sa clé naturelle (Name, Platform, Year, Publisher)
+    et comparée à l'empreinte enregistrée dans `empreintes_produits`.
+
+    Args:
+        path_csv (str): Nouveau fichier vgsales.csv.
+        reference (str, optional): CSV d'origine de la base, utilisé pour amorcer les empreintes
+            si la table est vide alors que des produits existent.
+        dry_run (bool, optional): Si True, calcule le rapport sans rien écrire.
+
+    Behavior:
+        - Les nouvelles valeurs de Genre, Platform, Publisher et Year sont insérées en lot.
+        - Les codes écrits dans `produits` suivent la numérotation du notebook de création
+          (code de la table de dimension - 1), comme les produits existants.
+        - Les nouveaux produits sont insérés en lot (prix tiré entre 20 et 150, comme à la création).
+        - Les produits modifiés sont mis à jour par clé primaire : leur `produit_id` ne change pas.
+          Leurs commandes sont retirées des classements puis réappliquées, dans la même
+          transaction : les totaux passent de l'ancien genre au nouveau.
+        - Les produits absents du fichier sont comptés mais jamais supprimés (commandes existantes).
+
+    Returns:
+        dict: Rapport `lignes`, `inseres`, `modifies`, `inchanges`, `absents`,
+            `nouvelles_dimensions` (par table) et `duree_s`.
+
+    Raises:
+        ValueError: Si la base contient des produits sans empreintes et qu'aucune référence n'est fournie.
+    """
+    debut = time.perf_counter()
+    df = lire_catalogue(path_csv)
+
+    stockees = _empreintes(session)
+    if not stockees and session.scalar(select(Produit.produit_id).limit(1)) is not None:
+        if reference is None:
+            raise ValueError("Aucune empreinte enregistrée : préciser le CSV de référence de la base.")
+        amorcer_empreintes(session, reference, commit=not dry_run)
+        stockees = _empreintes(session)
+
+    connue = df["cle"].isin(stockees.keys()).to_numpy()
+    ancienne = df["cle"].map({cle: empreinte for cle, (_, empreinte) in stockees.items()})
+    nouveaux = df[~connue]
+    modifies = df[connue & (ancienne != df["empreinte"]).to_numpy()]
+
+    rapport = {
+        "lignes": len(df),
+        "inseres": len(nouveaux),
+        "modifies": len(modifies),
+        "inchanges": int(connue.sum()) - len(modifies),
+        "absents": len(stockees) - int(connue.sum()),
+        "nouvelles_dimensions": {},
+    }
+    delta = df[~connue | (ancienne != df["empreinte"]).to_numpy()]
+
+    # dimensions : seules les valeurs inconnues sont insérées ;
+    # `codes` donne, pour chaque valeur, le code tel qu'il est stocké dans `produits`
+    codes = {}
+    for colonne, (table, nom, code, _) in DIMENSIONS.items():
+        existants = dict(session.execute(select(nom, code)).all())
+        manquants = sorted(set(delta[colonne]) - existants.keys())
+        rapport["nouvelles_dimensions"][table.__tablename__] = manquants
+        if manquants and not dry_run:
+            session.execute(insert(table), [{nom.key: v} for v in manquants])
+            existants = dict(session.execute(select(nom, code)).all())
+        codes[colonne] = {valeur: code - DECALAGE_CODES for valeur, code in existants.items()}
+
+    if dry_run:
+        session.rollback()
+        rapport["duree_s"] = round(time.perf_counter() - debut, 3)
+        return rapport
+
+    # nouveaux produits
+    if len(nouveaux):
+        lignes = [
+            {"name": ligne["Name"], "prix": int(prix),
+             **{champ: codes[colonne].get(ligne[colonne]) for colonne, (_, _, _, champ) in DIMENSIONS.items()}}
+            for ligne, prix in zip(nouveaux.to_dict(orient="records"),
+                                   np.random.randint(20, 150, size=len(nouveaux)))
+        ]
+        ids = []
+        for lot in par_lots(lignes):
+            ids += session.execute(insert(Produit).returning(Produit.produit_id, sort_by_parameter_order=True),
+                                   lot).scalars().all()
+        empreintes = [{"produit_id": pid, "cle": cle, "empreinte": emp}
+                      for pid, cle, emp in zip(ids, nouveaux["cle"], nouveaux["empreinte"])]
+        for lot in par_lots(empreintes):
+            session.execute(insert(EmpreinteProduit), lot)
+
+    # produits modifiés : mise à jour par clé primaire, produit_id inchangé
+    if len(modifies):
+        produit_ids = [stockees[cle][0] for cle in modifies["cle"]]
+        commande_ids = []
+        for lot in par_lots(produit_ids):
+            commande_ids += session.execute(
+                select(Commande.commande_id).where(Commande.produit_id.in_(lot))
+            ).scalars().all()
+        appliquer_commandes(session, commande_ids, signe=-1)
+        maj_produits = [
+            {"produit_id": stockees[ligne["cle"]][0],
+             **{DIMENSIONS[colonne][3]: codes[colonne][ligne[colonne]] for colonne in COLONNES_ATTRIBUTS}}
+            for ligne in modifies.to_dict(orient="records")
+        ]
+        session.execute(update(Produit), maj_produits)
+        session.execute(update(EmpreinteProduit), [
+            {"produit_id": stockees[cle][0], "empreinte": emp}
+            for cle, emp in zip(modifies["cle"], modifies["empreinte"])
+        ])
+        appliquer_commandes(session, commande_ids)
+
+    session.commit()
+    rapport["duree_s"] = round(time.perf_counter() - debut, 3)
+    return rapport
@@ -0,0 +1,431 @@
+# import
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+from datetime import timedelta
+
+import numpy as np
+from sqlalchemy import func, insert, select
+from sqlalchemy.exc import OperationalError
+
+from components.models import Age, Client, Commande, Produit, Promotion, Region, promotions_regions
+from components.routeur import RouteurSessions
+
+
+# Opérations simulées : trafic de commandes et d'administration
+OPERATIONS = ("create_commande", "add_log", "read_table", "update_table")
+MELANGE_DEFAUT = {"create_commande": 0.5, "add_log": 0.3, "read_table": 0.1, "update_table": 0.1}
+MODES = ("routeur", "session")
+PERCENTILES = (50, 90, 95, 99)
+
+# Valeurs du notebook de création
+REGIONS = ["NA", "EU", "JP", "Other"]
+AGES = ["0 - 6 ans", "7 - 14 ans", "15 - 32 ans", "33 - 55 ans", "55 - 120 ans"]
+
+
+def preparer_base(chemin, path_csv, nb_clients=350, nb_promotions=15, nb_commandes=5000,
+                  part_promotions=0.2, graine=0):
+    """Crée une base de test à partir de vgsales.csv, comme le notebook de création.
+
+    Produits et dimensions viennent de `importer_catalogue` ; régions, tranches d'âge, clients,
+    promotions et commandes sont tirés au hasard (graine fixe), les commandes réparties sur les
+    30 derniers jours. Tous les IDs sont tirés parmi les lignes réellement insérées.
+
+    Args:
+        chemin (str): Fichier à créer. Ne doit pas exister.
+        path_csv (str): vgsales.csv.
+        nb_clients, nb_promotions, nb_commandes (int, optional): Volumes générés.
+        part_promotions (float, optional): Part des commandes portant sur un produit en promotion,
+            pour exercer la recherche de promotion par région.
+        graine (int, optional): Graine du générateur aléatoire.
+
+    Returns:
+        dict: Nombre de `produits`, `clients`, `promotions`, `commandes` créés et
+            `commandes_promotion` (commandes ayant reçu une promotion de leur région).
+
+    Raises:
+        FileExistsError: Si `chemin` existe déjà (la base de production n'est jamais écrasée).
+    """
+    from components.catalogue import importer_catalogue
+    from components.crud import create_lignes
+    from components.ventes import maintenant
+
+    if os.path.exists(chemin):
+        raise FileExistsError(f"{chemin} existe déjà : choisir un fichier de test neuf.")
+    rng = np.random.default_rng(graine)
+
+    def inserer(session, table, cle, lignes):
+        return session.execute(insert(table).returning(cle, sort_by_parameter_order=True), lignes).scalars().all()
+
+    routeur = RouteurSessions(chemin)
+    try:
+        importer_catalogue(routeur, path_csv)
+        with routeur.ecriture() as session:
+            region_ids = inserer(session, Region, Region.region_id, [{"region_nom": r} for r in REGIONS])
+            age_ids = inserer(session, Age, Age.age_id, [{"age_plage": a} for a in AGES])
+            client_ids = inserer(session, Client, Client.client_id, [
+                {"region_id": int(rng.choice(region_ids)), "age_id": _tirer_age(rng, age_ids)}
+                for _ in range(nb_clients)
+            ])
+            produit_ids = session.execute(select(Produit.produit_id)).scalars().all()
+            promus = [int(p) for p in rng.choice(produit_ids, nb_promotions)]
+            promotion_ids = inserer(session, Promotion, Promotion.promotion_id, [
+                {"produit_id": p, "promotion_percent": int(rng.integers(1, 9)) * 10} for p in promus
+            ])
+            session.execute(insert(promotions_regions), [
+                {"promotion_id": pid, "region_id": int(rng.choice(region_ids))} for pid in promotion_ids
+            ])
+
+        debut = maintenant()
+        with routeur.ecriture() as session:
+            create_lignes(session, Commande, [
+                {"client_id": int(rng.choice(client_ids)),
+                 "produit_id": _tirer_produit(rng, produit_ids, promus, part_promotions),
+                 "nb_produit": int(rng.integers(1, 5)),
+                 "date_commande": debut - timedelta(seconds=int(rng.integers(0, 30 * 86400)))}
+                for _ in range(nb_commandes)
+            ], commit=False)
+            avec_promotion = session.scalar(
+                select(func.count(Commande.commande_id)).where(Commande.promotion_id.is_not(None)))
+    finally:
+        routeur.dispose()
+
+    return {"produits": len(produit_ids), "clients": nb_clients, "promotions": nb_promotions,
+            "commandes": nb_commandes, "commandes_promotion": avec_promotion}
+
+
+def _tirer_age(rng, age_ids):
+    # même tirage que le notebook : tranche centrée sur la 2e, jamais la dernière
+    return int(age_ids[max(0, min(3, len(age_ids) - 1, int(np.round(rng.normal(1.5, 1)))))])
+
+
+def _tirer_produit(rng, produit_ids, promus, part_promotions):
+    if len(promus) and rng.random() < part_promotions:
+        return int(rng.choice(promus))
+    return int(rng.choice(produit_ids))
+
+
+def lire_melange(texte):
+    """Convertit "create_commande=0.5,add_log=0.3" en dictionnaire de poids.
+
+    Raises:
+        ValueError: Si une opération est inconnue ou si aucun poids n'est positif.
+    """
+    melange = {}
+    for element in filter(None, (e.strip() for e in texte.split(","))):
+        nom, _, poids = element.partition("=")
+        melange[nom.strip()] = float(poids)
+    _verifier_melange(melange)
+    return melange
+
+
+def _verifier_melange(melange):
+    inconnues = set(melange) - set(OPERATIONS)
+    if inconnues:
+        raise ValueError(f"Opérations inconnues : {', '.join(sorted(inconnues))} (attendu : {', '.join(OPERATIONS)})")
+    if sum(melange.values()) <= 0:
+        raise ValueError("Le mélange doit contenir au moins un poids positif.")
+
+
+def _est_verrou(erreur):
+    texte = str(erreur).lower()
+    return isinstance(erreur, OperationalError) and ("database is locked" in texte or "database is busy" in texte)
+
+
+def _ids(base):
+    """IDs existants de la base de test, parmi lesquels les opérations tirent leurs arguments."""
+    with sqlite3.connect(base) as conn:
+        def colonne(requete):
+            return [ligne[0] for ligne in conn.execute(requete)]
+
+        return {
+            "clients": colonne("SELECT client_id FROM clients"),
+            "produits": colonne("SELECT produit_id FROM produits"),
+            "ages": colonne("SELECT age_id FROM ages ORDER BY age_id"),
+            "promus": colonne("SELECT DISTINCT produit_id FROM promotions WHERE produit_id IS NOT NULL"),
+        }
+
+
+def _operations(ids, part_promotions):
+    """Associe chaque nom d'opération à un appel CRUD avec des arguments tirés au hasard."""
+    from components.crud import add_log, create_commande, read_table, update_table
+
+    clients, produits, promus = (np.array(ids[cle]) for cle in ("clients", "produits", "promus"))
+
+    def client(rng):
+        return int(rng.choice(clients))
+
+    return {
+        "create_commande": lambda s, rng: create_commande(
+            s, client(rng), _tirer_produit(rng, produits, promus, part_promotions), int(rng.integers(1, 5))),
+        "add_log": lambda s, rng: add_log(
+            s, "INSERT", "commandes", client_id=client(rng), details='{"source": "charge"}'),
+        "read_table": lambda s, rng: read_table(s, Client),
+        "update_table": lambda s, rng: _silencieux(
+            update_table, s, Client, client(rng), age_id=_tirer_age(rng, ids["ages"])),
+    }
+
+
+class _Poubelle(io.TextIOBase):
+    """Flux texte qui jette tout ce qu'on y écrit."""
+
+    def writable(self):
+        return True
+
+    def write(self, s):
+        return len(s)
+
+
+_SILENCE = {"verrou": threading.Lock(), "actifs": 0, "redirection": None}
+
+
+def _silencieux(fonction, *args, **kwargs):
+    """Appelle `fonction` sans son affichage (update_table écrit un message à chaque appel).
+
+    `redirect_stdout` remplace `sys.stdout` pour tout le processus : les threads partagent une
+    seule redirection, ouverte par le premier entré et refermée par le dernier sorti. Sinon un
+    thread qui sort restaurerait la poubelle d'un autre comme sortie standard.
+    """
+    with _SILENCE["verrou"]:
+        if _SILENCE["actifs"] == 0:
+            _SILENCE["redirection"] = contextlib.redirect_stdout(_Poubelle())
+            _SILENCE["redirection"].__enter__()
+        _SILENCE["actifs"] += 1
+    try:
+        return fonction(*args, **kwargs)
+    finally:
+        with _SILENCE["verrou"]:
+            _SILENCE["actifs"] -= 1
+            if _SILENCE["actifs"] == 0:
+                _SILENCE["redirection"].__exit__(None, None, None)
+                _SILENCE["redirection"] = None
+
+
+def _fil(executer, operations, noms, poids, fin, rng, max_essais, attente_ms):
+    """Boucle d'un thread : tire une opération, l'exécute avec reprises sur verrou, mesure la latence."""
+    stats = {nom: {"latences": [], "verrous": 0, "reessais": 0, "echecs": 0} for nom in noms}
+    erreurs = {}
+    while time.time() < fin:
+        nom = noms[rng.choice(len(noms), p=poids)]
+        s = stats[nom]
+        debut = time.perf_counter()
+        for essai in range(max_essais):
+            try:
+                executer(operations[nom], rng)
+                s["latences"].append((time.perf_counter() - debut) * 1000)
+                break
+            except Exception as e:
+                if not _est_verrou(e):
+                    s["echecs"] += 1
+                    erreurs[type(e).__name__] = erreurs.get(type(e).__name__, 0) + 1
+                    break
+                s["verrous"] += 1
+                if essai == max_essais - 1:
+                    s["echecs"] += 1
+                    break
+                s["reessais"] += 1
+                # attente exponentielle avec gigue pour désynchroniser les threads
+                time.sleep(attente_ms / 1000 * 2 ** essai * (0.5 + rng.random()))
+    return stats, erreurs
+
+
+def _processus(params, indice):
+    """Point d'entrée d'un processus de charge : lance `threads` threads sur son propre moteur."""
+    operations = _operations(params["ids"], params["part_promotions"])
+    noms = [nom for nom, p in params["melange"].items() if p > 0]
+    poids = np.array([params["melange"][nom] for nom in noms], dtype=float)
+    poids /= poids.sum()
+
+    if params["mode"] == "routeur":
+        routeur = RouteurSessions(params["base"], taille_pool_lecture=params["threads"],
+                                  busy_timeout_ms=params["busy_timeout_ms"])
+        fermer = routeur.dispose
+
+        def executer(operation, rng):
+            operation(routeur, rng)
+    else:
+        # une session par opération sur un moteur classique, comme le menu d'administration
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+
+        moteur = create_engine(f"sqlite:///{params['base']}", pool_size=params["threads"],
+                               connect_args={"check_same_thread": False,
+                                             "timeout": params["busy_timeout_ms"] / 1000})
+        Session = sessionmaker(bind=moteur)
+        fermer = moteur.dispose
+
+        def executer(operation, rng):
+            with Session() as session:
+                operation(session, rng)
+
+    resultats = [None] * params["threads"]
+
+    def lancer(i):
+        rng = np.random.default_rng([params["graine"], indice, i])
+        resultats[i] = _fil(executer, operations, noms, poids, params["fin"], rng,
+                            params["max_essais"], params["attente_ms"])
+
+    fils = [threading.Thread(target=lancer, args=(i,)) for i in range(params["threads"])]
+    retard = max(0.0, time.time() - params["depart"])
+    time.sleep(max(0.0, params["depart"] - time.time()))
+    debut = time.time()
+    for fil in fils:
+        fil.start()
+    for fil in fils:
+        fil.join()
+    fin = time.time()
+    fermer()
+    return {"resultats": resultats, "debut": debut, "fin": fin, "retard_s": retard}
+
+
+def lancer_charge(base, threads=4, processus=1, duree=10.0, melange=None, mode="routeur",
+                  max_essais=5, attente_ms=10, busy_timeout_ms=5000, part_promotions=0.2, graine=0):
+    """Lance un test de charge : `processus` processus de `threads` threads pendant `duree` secondes.
+
+    Chaque thread tire ses opérations selon `melange` et réessaie jusqu'à `max_essais` fois
+    une opération qui échoue sur "database is locked", avec une attente exponentielle.
+    Les processus démarrent ensemble (heure de départ commune) et sont lancés en `spawn` :
+    aucun moteur SQLAlchemy n'est partagé entre processus.
+
+    Args:
+        base (str): Base de test (voir `preparer_base`). Jamais la base de production.
+        threads (int, optional): Threads par processus.
+        processus (int, optional): Nombre de processus.
+        duree (float, optional): Durée du test, en secondes.
+        melange (dict, optional): Poids de chaque opération de `OPERATIONS`. Par défaut `MELANGE_DEFAUT`.
+        mode (str, optional): "routeur" (RouteurSessions, un écrivain par processus)
+            ou "session" (une Session par opération sur un moteur classique).
+        max_essais (int, optional): Tentatives par opération.
+        attente_ms (int, optional): Attente de base entre deux tentatives.
+        busy_timeout_ms (int, optional): Busy timeout SQLite.
+        part_promotions (float, optional): Part des `create_commande` sur un produit en promotion.
+        graine (int, optional): Graine des générateurs aléatoires.
+
+    Returns:
+        dict: Rapport JSON-sérialisable : `config`, `duree_s`, `operations`, `debit_ops_s`,
+            `verrous`, `reessais`, `echecs`, `erreurs` et, par opération, le nombre, le débit,
+            les percentiles de latence (ms), les verrous, reprises et échecs.
+
+    Raises:
+        ValueError: Si le mélange ou le mode est invalide.
+
+    Exemple:
+        rapport = lancer_charge("/tmp/charge.db", threads=8, processus=2, duree=30)
+    """
+    melange = dict(melange or MELANGE_DEFAUT)
+    _verifier_melange(melange)
+    if mode not in MODES:
+        raise ValueError(f"Mode inconnu : {mode} (attendu : {', '.join(MODES)})")
+
+    base = os.path.abspath(base)
+    ids = _ids(base)
+    with sqlite3.connect(base) as conn:
+        journal = conn.execute("PRAGMA journal_mode").fetchone()[0]
+
+    config = {"base": base, "threads": threads, "processus": processus, "duree": duree, "melange": melange,
+              "mode": mode, "max_essais": max_essais, "attente_ms": attente_ms,
+              "busy_timeout_ms": busy_timeout_ms, "part_promotions": part_promotions, "graine": graine}
+    # laisse le temps aux processus de démarrer (import de pandas, ouverture des moteurs)
+    depart = time.time() + 1.0 + 0.5 * processus
+    params = dict(config, ids=ids, depart=depart, fin=depart + duree)
+
+    contexte = multiprocessing.get_context("spawn")
+    with contexte.Pool(processus) as pool:
+        sorties = pool.starmap(_processus, [(params, i) for i in range(processus)])
+
+    rapport = _rapport(sorties, config)
+    rapport["sqlite"] = {"version": sqlite3.sqlite_version, "journal_mode": journal}
+    return rapport
+
+
+def _rapport(sorties, config):
+    duree = max(s["fin"] for s in sorties) - min(s["debut"] for s in sorties)
+    par_operation, erreurs = {}, {}
+    for sortie in sorties:
+        for stats, err in sortie["resultats"]:
+            for nom, s in stats.items():
+                cumul = par_operation.setdefault(nom, {"latences": [], "verrous": 0, "reessais": 0, "echecs": 0})
+                cumul["latences"] += s["latences"]
+                for cle in ("verrous", "reessais", "echecs"):
+                    cumul[cle] += s[cle]
+            for nom, n in err.items():
+                erreurs[nom] = erreurs.get(nom, 0) + n
+
+    operations = {}
+    for nom, s in par_operation.items():
+        latences = np.array(s["latences"])
+        operations[nom] = {
+            "nombre": len(latences),
+            "debit_ops_s": round(len(latences) / duree, 1),
+            "latence_ms": _latences(latences),
+            "verrous": s["verrous"],
+            "reessais": s["reessais"],
+            "echecs": s["echecs"],
+        }
+
+    toutes = np.concatenate([np.array(s["latences"]) for s in par_operation.values()] or [np.empty(0)])
+    return {
+        "config": config,
+        "duree_s": round(duree, 3),
+        "retard_max_s": round(max(s["retard_s"] for s in sorties), 3),
+        "operations": len(toutes),
+        "debit_ops_s": round(len(toutes) / duree, 1),
+        "latence_ms": _latences(toutes),
+        "verrous": sum(o["verrous"] for o in operations.values()),
+        "reessais": sum(o["reessais"] for o in operations.values()),
+        "echecs": sum(o["echecs"] for o in operations.values()),
+        "erreurs": erreurs,
+        "par_operation": operations,
+    }
+
+
+def _latences(latences):
+    if not len(latences):
+        return None
+    valeurs = {f"p{p}": round(float(v), 3) for p, v in zip(PERCENTILES, np.percentile(latences, PERCENTILES))}
+    valeurs["moyenne"] = round(float(latences.mean()), 3)
+    valeurs["max"] = round(float(latences.max()), 3)
+    return valeurs
+
+
+def lire_rapport(chemin):
+    """Relit un rapport enregistré en JSON."""
+    with open(chemin, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def comparer_rapports(reference, candidat):
+    """Compare deux rapports de `lancer_charge` (ex.: avant / après une modification).
+
+    Returns:
+        pandas.DataFrame: Par opération et au total : débit, p95, p99, verrous et échecs
+            des deux rapports, avec l'écart en % pour le débit et les percentiles.
+    """
+    import pandas as pd
+
+    def lignes(rapport):
+        yield "TOTAL", rapport
+        yield from rapport["par_operation"].items()
+
+    def valeurs(stats):
+        latence = stats["latence_ms"] or {}
+        return {"debit": stats["debit_ops_s"], "p95": latence.get("p95"), "p99": latence.get("p99"),
+                "verrous": stats["verrous"], "echecs": stats["echecs"]}
+
+    ref = {nom: valeurs(s) for nom, s in lignes(reference)}
+    cand = {nom: valeurs(s) for nom, s in lignes(candidat)}
+    noms = list(dict.fromkeys(list(ref) + list(cand)))
+
+    df = pd.DataFrame(index=pd.Index(noms, name="operation"))
+    for mesure in ("debit", "p95", "p99", "verrous", "echecs"):
+        df[f"{mesure}_ref"] = [ref.get(n, {}).get(mesure) for n in noms]
+        df[mesure] = [cand.get(n, {}).get(mesure) for n in noms]
+        if mesure in ("debit", "p95", "p99"):
+            a, b = df[f"{mesure}_ref"].astype(float), df[mesure].astype(float)
+            df[f"{mesure}_%"] = ((b - a) / a * 100).round(1)
+    return df
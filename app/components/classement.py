@@ -0,0 +1,314 @@
+# import
+import threading
+
+from sqlalchemy import event, func, literal, select, delete
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from components.models import Classement, Client, Commande, Generation, Produit, Promotion
+from components.routeur import en_lecture, en_ecriture
+
+
+DIMENSIONS = {
+    "region": Client.region_id,
+    "genre": Produit.genre_cod,
+    "platform": Produit.platform_cod,
+}
+CRITERES = ("unites", "revenu")
+TOP_MAX = 100      # taille des tops gardés en mémoire ; au-delà, lecture SQL
+TAILLE_LOT = 500   # lignes par requête IN ou par insertion groupée
+
+
+def revenu_ligne():
+    """Montant d'une ligne de commande, avec la promotion enregistrée sur la commande."""
+    return (Commande.nb_produit * Produit.prix
+            * (1 - 0.01 * func.coalesce(Promotion.promotion_percent, 0)))
+
+
+def _base(session):
+    """Identifie la base d'une session (les tops en mémoire sont séparés par fichier)."""
+    routeur = session.info.get("routeur")
+    return routeur.db_path if routeur is not None else str(session.get_bind().url)
+
+
+def generation(session: Session):
+    """Génération courante des classements (0 si la table n'a jamais été écrite)."""
+    return session.scalar(select(Generation.valeur).where(Generation.nom == "classements")) or 0
+
+
+def _incrementer_generation(session):
+    stmt = insert(Generation).values(nom="classements", valeur=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Generation.nom], set_={"valeur": Generation.valeur + 1}
+    ).returning(Generation.valeur)
+    return session.execute(stmt).scalar_one()
+
+
+def par_lots(valeurs, taille=TAILLE_LOT):
+    """Découpe `valeurs` en listes d'au plus `taille` éléments (requêtes IN, insertions groupées).
+
+    Exemple:
+        for lot in par_lots(commande_ids):
+            session.execute(select(Commande).where(Commande.commande_id.in_(lot)))
+    """
+    valeurs = list(valeurs)
+    for i in range(0, len(valeurs), taille):
+        yield valeurs[i:i + taille]
+
+
+def lignes_commandes(session: Session, commande_ids):
+    """Lit, par lots, les faits de vente de commandes : produit, région, genre, plateforme,
+    promotion, date, unités et revenu. Partagé par les classements et les agrégats de ventes.
+
+    Returns:
+        list[Row]: Une ligne par commande existante.
+    """
+    lignes = []
+    for lot in par_lots(commande_ids):
+        lignes += session.execute(_requete_lignes().where(Commande.commande_id.in_(lot))).all()
+    return lignes
+
+
+def _requete_lignes():
+    return (
+        select(
+            Commande.produit_id,
+            Client.region_id.label("region"),
+            Produit.genre_cod.label("genre"),
+            Produit.platform_cod.label("platform"),
+            Commande.promotion_id,
+            Commande.date_commande,
+            Commande.nb_produit,
+            revenu_ligne().label("revenu"),
+        )
+        .join(Produit, Produit.produit_id == Commande.produit_id)
+        .join(Client, Client.client_id == Commande.client_id)
+        .outerjoin(Promotion, Promotion.promotion_id == Commande.promotion_id)
+    )
+
+
+class CacheClassements:
+    """Tops N en mémoire, servis avec une seule lecture de clé primaire.
+
+    Les tops sont indexés par (base, dimension, dimension_id, critère) ;
+    chacun contient au plus `TOP_MAX` couples (valeur, produit_id) triés par valeur décroissante.
+    Une hausse (nouvelle commande) est appliquée sur place ; une baisse (suppression) qui touche
+    un produit du top invalide l'entrée, rechargée depuis la table `classements` au prochain appel.
+
+    Chaque base a une génération (table `generations`) incrémentée dans la transaction qui écrit
+    `classements`. Avant de servir un top, la génération lue en base est comparée à celle du cache :
+    si un autre processus (CLI, test de charge, restauration) a écrit entre-temps, les tops de
+    cette base sont rechargés.
+    """
+
+    def __init__(self):
+        self._tops = {}
+        self._generations = {}
+        self._verrou = threading.Lock()
+
+    def lire(self, session, dimension, dimension_id, critere):
+        base = _base(session)
+        cle = (base, dimension, dimension_id, critere)
+        courante = generation(session)
+        with self._verrou:
+            if self._generations.get(base) != courante:
+                self._oublier(base)
+                self._generations[base] = courante
+            top = self._tops.get(cle)
+        if top is None:
+            colonne = getattr(Classement, critere)
+            lignes = session.execute(
+                select(colonne, Classement.produit_id)
+                .where(Classement.dimension == dimension, Classement.dimension_id == dimension_id)
+                .order_by(colonne.desc(), Classement.produit_id)
+                .limit(TOP_MAX)
+            ).all()
+            top = [(valeur, produit_id) for valeur, produit_id in lignes]
+            with self._verrou:
+                if self._generations.get(base) == courante:
+                    self._tops[cle] = top
+        return top
+
+    def appliquer(self, totaux, generations):
+        """Met à jour les tops avec les nouveaux totaux {(base, dimension, id, produit_id): (unites, revenu, hausse)}.
+
+        `generations` donne, par base, la génération avant et après la transaction : si le cache
+        n'était pas à la génération de départ, une autre écriture lui a échappé et la base est invalidée.
+        """
+        with self._verrou:
+            for base, (avant, apres) in generations.items():
+                if self._generations.get(base) == avant:
+                    self._generations[base] = apres
+                else:
+                    self._oublier(base)
+            for (base, dimension, dimension_id, produit_id), (unites, revenu, hausse) in totaux.items():
+                if base not in self._generations:
+                    continue
+                for critere, valeur in (("unites", unites), ("revenu", revenu)):
+                    cle = (base, dimension, dimension_id, critere)
+                    top = self._tops.get(cle)
+                    if top is None:
+                        continue
+                    present = any(p == produit_id for _, p in top)
+                    if not hausse:
+                        if present:
+                            del self._tops[cle]
+                        continue
+                    if present:
+                        top = [(v, p) for v, p in top if p != produit_id]
+                    elif len(top) == TOP_MAX and valeur <= top[-1][0]:
+                        continue
+                    top.append((valeur, produit_id))
+                    top.sort(key=lambda t: (-t[0], t[1]))
+                    self._tops[cle] = top[:TOP_MAX]
+
+    def invalider(self, base=None):
+        with self._verrou:
+            if base is None:
+                self._tops.clear()
+                self._generations.clear()
+            else:
+                self._oublier(base)
+
+    def _oublier(self, base):
+        self._tops = {cle: top for cle, top in self._tops.items() if cle[0] != base}
+        self._generations.pop(base, None)
+
+
+CACHE = CacheClassements()
+
+
+@event.listens_for(Session, "after_commit")
+def _publier_cache(session):
+    totaux = session.info.pop("classements_maj", None)
+    generations = session.info.pop("classements_generations", None)
+    if generations:
+        CACHE.appliquer(totaux or {}, generations)
+
+
+@event.listens_for(Session, "after_rollback")
+def _oublier_cache(session):
+    session.info.pop("classements_maj", None)
+    session.info.pop("classements_generations", None)
+
+
+def appliquer_commandes(session: Session, commande_ids, signe=1, lignes=None):
+    """Répercute des commandes dans la table `classements` (signe=1 : ajout, signe=-1 : suppression).
+
+    À appeler dans la même transaction que l'écriture des commandes : après une insertion
+    (les commandes existent) ou avant une suppression (elles existent encore).
+    La génération des classements est incrémentée dans la même transaction ;
+    le cache mémoire n'est mis à jour qu'au commit de la session.
+
+    Args:
+        commande_ids (list[int]): IDs des commandes concernées.
+        signe (int, optional): 1 pour ajouter, -1 pour retirer.
+        lignes (list, optional): Résultat de `lignes_commandes`, s'il est déjà lu.
+    """
+    if lignes is None:
+        lignes = lignes_commandes(session, commande_ids)
+
+    deltas = {}
+    for ligne in lignes:
+        for dimension in DIMENSIONS:
+            if getattr(ligne, dimension) is None:
+                continue
+            cle = (dimension, getattr(ligne, dimension), ligne.produit_id)
+            unites, revenu = deltas.get(cle, (0, 0.0))
+            deltas[cle] = (unites + signe * (ligne.nb_produit or 0), revenu + signe * (ligne.revenu or 0))
+    if not deltas:
+        return
+
+    stmt = insert(Classement)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Classement.dimension, Classement.dimension_id, Classement.produit_id],
+        set_={"unites": Classement.unites + stmt.excluded.unites,
+              "revenu": Classement.revenu + stmt.excluded.revenu},
+    ).returning(Classement.dimension, Classement.dimension_id, Classement.produit_id,
+                Classement.unites, Classement.revenu)
+    valeurs = [
+        {"dimension": d, "dimension_id": d_id, "produit_id": p, "unites": u, "revenu": r}
+        for (d, d_id, p), (u, r) in deltas.items()
+    ]
+    base = _base(session)
+    nouvelle = _incrementer_generation(session)
+    generations = session.info.setdefault("classements_generations", {})
+    generations[base] = (generations.get(base, (nouvelle - 1,))[0], nouvelle)
+    totaux = session.info.setdefault("classements_maj", {})
+    for d, d_id, p, unites, revenu in session.execute(stmt, valeurs):
+        # une baisse dans la même transaction (ex.: update = retrait puis ajout) reste une baisse
+        hausse = signe > 0 and totaux.get((base, d, d_id, p), (0, 0, True))[2]
+        totaux[(base, d, d_id, p)] = (unites, revenu, hausse)
+
+
+@en_ecriture
+def reconstruire_classements(session: Session):
+    """Recalcule entièrement la table `classements` à partir de `commandes`.
+
+    Returns:
+        int: Nombre de lignes de classement écrites.
+    """
+    session.execute(delete(Classement))
+    total = 0
+    for dimension, colonne in DIMENSIONS.items():
+        agregat = (
+            select(
+                literal(dimension).label("dimension"),
+                colonne.label("dimension_id"),
+                Commande.produit_id,
+                func.sum(Commande.nb_produit).label("unites"),
+                func.sum(revenu_ligne()).label("revenu"),
+            )
+            .join(Produit, Produit.produit_id == Commande.produit_id)
+            .join(Client, Client.client_id == Commande.client_id)
+            .outerjoin(Promotion, Promotion.promotion_id == Commande.promotion_id)
+            .where(colonne.is_not(None))
+            .group_by(colonne, Commande.produit_id)
+        )
+        res = session.execute(
+            insert(Classement).from_select(
+                ["dimension", "dimension_id", "produit_id", "unites", "revenu"], agregat
+            )
+        )
+        total += res.rowcount
+    _incrementer_generation(session)
+    session.info.pop("classements_maj", None)
+    session.info.pop("classements_generations", None)
+    session.commit()
+    CACHE.invalider(_base(session))
+    return total
+
+
+@en_lecture
+def top_produits(session: Session, dimension, dimension_id, n=20, par="unites"):
+    """Retourne les `n` meilleurs produits d'une région, d'un genre ou d'une plateforme.
+
+    Args:
+        dimension (str): "region", "genre" ou "platform".
+        dimension_id (int): region_id, genre_cod ou platform_cod.
+        n (int, optional): Taille du classement. Par défaut 20.
+        par (str, optional): "unites" ou "revenu".
+
+    Returns:
+        list[tuple]: (produit_id, valeur) triés par valeur décroissante.
+
+    Raises:
+        ValueError: Si la dimension ou le critère est inconnu.
+    """
+    if dimension not in DIMENSIONS:
+        raise ValueError(f"Dimension inconnue : {dimension} (attendu : {', '.join(DIMENSIONS)})")
+    if par not in CRITERES:
+        raise ValueError(f"Critère inconnu : {par} (attendu : {', '.join(CRITERES)})")
+
+    if n > TOP_MAX:
+        colonne = getattr(Classement, par)
+        lignes = session.execute(
+            select(Classement.produit_id, colonne)
+            .where(Classement.dimension == dimension, Classement.dimension_id == dimension_id)
+            .order_by(colonne.desc(), Classement.produit_id)
+            .limit(n)
+        ).all()
+        return [tuple(ligne) for ligne in lignes]
+
+    top = CACHE.lire(session, dimension, dimension_id, par)
+    return [(produit_id, valeur) for valeur, produit_id in top[:n]]
@@ -0,0 +1,114 @@
+# import
+import numpy as np
+
+
+# Quantités et prix : multipliés entre eux par les appelants, gardés au moins en int32
+COLONNES_MESURES = ("nb_produit", "prix", "promotion_percent", "Nb_commande")
+
+
+def compacter_df(df, seuil_categorie=0.5, mesures=COLONNES_MESURES):
+    """Réduit l'empreinte mémoire d'un DataFrame renvoyé par la couche READ.
+
+    Args:
+        df (pandas.DataFrame): DataFrame à compacter (modifié sur place).
+        seuil_categorie (float, optional): Ratio maximal valeurs uniques / lignes
+            pour convertir une colonne texte en `category`. Par défaut 0.5.
+        mesures (tuple, optional): Colonnes entières jamais réduites sous int32, pour que
+            leurs produits (ex. `nb_produit * prix`) ne débordent pas.
+
+    Behavior:
+        - Les entiers sont réduits au plus petit type signé (int8, int16, ...) : pas de
+          types non signés, dont les soustractions reboucleraient. Les colonnes de `mesures`
+          restent au moins en int32.
+        - Les flottants dont toutes les valeurs sont entières (ex. `promotion_percent`
+          après `fillna(0)`) deviennent des entiers, les autres passent en float32.
+        - Les colonnes texte peu diversifiées (`region_nom`, `age_plage`,
+          `platform_nom`, ...) deviennent des catégories.
+
+    Returns:
+        pandas.DataFrame: Le même DataFrame, compacté.
+    """
+    import pandas as pd
+
+    for col in df.columns:
+        serie = df[col]
+        if pd.api.types.is_bool_dtype(serie):
+            continue
+        minimum = np.int32 if col in mesures else None
+        if pd.api.types.is_integer_dtype(serie):
+            df[col] = _reduire_entier(serie, minimum)
+        elif pd.api.types.is_float_dtype(serie):
+            valeurs = serie.to_numpy()
+            if not np.isnan(valeurs).any() and np.array_equal(valeurs, np.trunc(valeurs)):
+                df[col] = _reduire_entier(serie.astype(np.int64), minimum)
+            else:
+                df[col] = pd.to_numeric(serie, downcast="float")
+        elif (serie.dtype == object or pd.api.types.is_string_dtype(serie)) and len(serie) > 0:
+            if serie.nunique(dropna=False) / len(serie) <= seuil_categorie:
+                df[col] = serie.astype("category")
+
+    if (pd.api.types.is_integer_dtype(df.index) and len(df.index) > 0
+            and not isinstance(df.index, pd.RangeIndex)):
+        df.index = pd.Index(_reduire_entier(df.index.to_series()), name=df.index.name)
+    return df
+
+
+def _reduire_entier(serie, minimum=None):
+    import pandas as pd
+
+    serie = pd.to_numeric(serie, downcast="integer")
+    if minimum is not None and serie.dtype.itemsize < np.dtype(minimum).itemsize:
+        serie = serie.astype(minimum)
+    return serie
+
+
+def prix_total(nb_produit, prix, promotion_percent, dtype=np.float32):
+    """Calcule `nb_produit * prix * (1 - 0.01 * promotion_percent)` dans un seul tampon.
+
+    Les opérations sont faites sur place dans un unique tableau de sortie,
+    sans créer de temporaires de la taille du résultat.
+
+    Args:
+        nb_produit, prix, promotion_percent: Séries ou tableaux de même longueur.
+        dtype (numpy.dtype, optional): Type du résultat. Par défaut float32.
+
+    Returns:
+        numpy.ndarray: Prix total de chaque ligne.
+    """
+    total = np.array(promotion_percent, dtype=dtype)
+    np.multiply(total, -0.01, out=total)
+    np.add(total, 1, out=total)
+    np.multiply(total, np.asarray(prix), out=total, casting="unsafe")
+    np.multiply(total, np.asarray(nb_produit), out=total, casting="unsafe")
+    return total
+
+
+def rapport_memoire(avant, apres):
+    """Compare la mémoire occupée par un DataFrame avant et après compactage.
+
+    Args:
+        avant (pandas.DataFrame): DataFrame au format par défaut.
+        apres (pandas.DataFrame): Le même DataFrame renvoyé avec `compact=True`.
+
+    Returns:
+        pandas.DataFrame: Une ligne par colonne (plus `Index` et `TOTAL`) avec les colonnes
+            `dtype_avant`, `dtype_apres`, `octets_avant`, `octets_apres` et `gain_%`.
+
+    Exemple:
+        rapport_memoire(read_command(session), read_command(session, compact=True))
+    """
+    import pandas as pd
+
+    octets_avant = avant.memory_usage(deep=True)
+    octets_apres = apres.memory_usage(deep=True)
+
+    rapport = pd.DataFrame({
+        "dtype_avant": avant.dtypes.astype(str),
+        "dtype_apres": apres.dtypes.astype(str),
+        "octets_avant": octets_avant,
+        "octets_apres": octets_apres,
+    })
+    rapport[["dtype_avant", "dtype_apres"]] = rapport[["dtype_avant", "dtype_apres"]].fillna("")
+    rapport.loc["TOTAL"] = ["", "", octets_avant.sum(), octets_apres.sum()]
+    rapport["gain_%"] = (100 * (1 - rapport["octets_apres"] / rapport["octets_avant"])).round(1)
+    return rapport
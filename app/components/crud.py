@@ -1,17 +1,102 @@
 # import
+from datetime import datetime, timezone
 from sqlalchemy.sql import func
-from components.models import Log, Client, DonnePersonnel, Commande, Produit, Genre, Promotion, Age, Region, Platform, Publisher, Year
+from components.models import Log, Client, DonnePersonnel, Commande, Produit, Genre, Promotion, Age, Region, Platform, Publisher, Year, promotions_regions
+from components.routeur import en_lecture, en_ecriture
+from components.classement import appliquer_commandes, lignes_commandes, par_lots
+from components.ventes import appliquer_ventes, maintenant
 from sqlalchemy.orm import Session
-import pandas as pd
+from sqlalchemy import DateTime, delete, exc, insert, inspect, select
+from sqlalchemy.sql.util import find_tables
 
 
+# Colonnes dont dépendent les classements et agrégats de ventes, et clé des commandes concernées
+DEPENDANCES_COMMANDES = {
+    Client: (("region_id",), Commande.client_id),
+    Produit: (("prix", "genre_cod", "platform_cod"), Commande.produit_id),
+    Promotion: (("promotion_percent",), Commande.promotion_id),
+}
+
+def _commandes_concernees(session: Session, table_class, ids, colonnes=None):
+    """IDs des commandes à recalculer quand les lignes `ids` de `table_class` changent.
+
+    Pour `Commande`, ce sont les IDs eux-mêmes. Pour `Client`, `Produit` et `Promotion`, les
+    commandes qui en dépendent, si `colonnes` (None : suppression) touche une colonne de dépendance.
+    """
+    if table_class is Commande:
+        return list(ids)
+    dependance = DEPENDANCES_COMMANDES.get(table_class)
+    if dependance is None or not ids:
+        return []
+    colonnes_dependance, cle = dependance
+    if colonnes is not None and not set(colonnes) & set(colonnes_dependance):
+        return []
+    commandes = []
+    for lot in par_lots(ids):
+        commandes += session.execute(select(Commande.commande_id).where(cle.in_(lot))).scalars().all()
+    return commandes
+
+def _ids_filtre(session: Session, table_class, filter_exp):
+    """IDs, sans doublon, des lignes de `table_class` retenues par `filter_exp`.
+
+    Les autres tables citées par le filtre (ex.: `Client.region_id == 1` pour `Commande`) sont
+    jointes par clé étrangère, sans produit cartésien.
+
+    Raises:
+        ValueError: Si le filtre cite une table sans clé étrangère vers `table_class`.
+    """
+    cle = inspect(table_class).primary_key[0]
+    source = table_class.__table__
+    for table in find_tables(filter_exp, check_columns=True):
+        if table is table_class.__table__:
+            continue
+        try:
+            source = source.join(table)
+        except exc.ArgumentError:
+            raise ValueError(f"Filtre sur {table.name} : pas de lien direct avec "
+                             f"{table_class.__tablename__}") from None
+    requete = select(cle).select_from(source).where(filter_exp).distinct()
+    return session.execute(requete).scalars().all()
+
+def _lire_dates(table_class, valeurs):
+    """Convertit les chaînes ISO (JSON de la CLI ou d'un batch) des colonnes DateTime en `datetime`.
+
+    Les dates avec fuseau sont ramenées en UTC sans fuseau, comme `maintenant()` : SQLite garde
+    l'heure locale et perd le décalage, la commande tomberait sinon dans le mauvais jour ou mois.
+    """
+    colonnes = table_class.__table__.columns
+    for cle, valeur in valeurs.items():
+        if cle not in colonnes or not isinstance(colonnes[cle].type, DateTime):
+            continue
+        if isinstance(valeur, str):
+            valeur = datetime.fromisoformat(valeur)
+        if isinstance(valeur, datetime) and valeur.tzinfo is not None:
+            valeur = valeur.astimezone(timezone.utc).replace(tzinfo=None)
+        valeurs[cle] = valeur
+    return valeurs
+
+def _repercuter_commandes(session: Session, commande_ids, signe=1):
+    """Met à jour les classements et les agrégats de ventes pour des commandes (signe -1 : retrait)."""
+    lignes = lignes_commandes(session, commande_ids)
+    appliquer_commandes(session, commande_ids, signe, lignes=lignes)
+    appliquer_ventes(session, commande_ids, signe, lignes=lignes)
+
+def _valider(session: Session, commit=True):
+    """Commit la transaction, ou se contente d'un flush si `commit=False` (mode batch)."""
+    if commit:
+        session.commit()
+    else:
+        session.flush()
+
 # Function pour CREATE un Client, DonnePersonnel, Commande, Produit, Promotion
-def create_client(session: Session, age_id:int, region_id:int):
+@en_ecriture
+def create_client(session: Session, age_id:int, region_id:int, commit=True):
     """Create and persist a new Client in the database.
 
     Args:
         age_id (int): ID of the age category for the client.
         region_id (int): ID of the region where the client belongs.
+        commit (bool, optional): If False, only flush; the caller commits the batch.
 
     Returns:
         Client: The newly created Client object.
@@ -25,18 +110,20 @@ def create_client(session: Session, age_id:int, region_id:int):
             region_id=region_id
         )
         session.add(client)
-        session.commit()
+        _valider(session, commit)
         return client
     except Exception as e:
         session.rollback()
         raise e
     
-def create_donne_personnel(session: Session, login, mot_de_passe_hash):
+@en_ecriture
+def create_donne_personnel(session: Session, login, mot_de_passe_hash, commit=True):
     """Create and persist a new DonnePersonnel (personal data) record for a client.
 
     Args:
         login (str): Login username for the personal data.
         mot_de_passe_hash (str): Hashed password.
+        commit (bool, optional): If False, only flush; the caller commits the batch.
 
     Returns:
         DonnePersonnel: The newly created DonnePersonnel object.
@@ -52,47 +139,64 @@ def create_donne_personnel(session: Session, login, mot_de_passe_hash):
             anonymise=False
         )
         session.add(donne)
-        session.commit()
+        _valider(session, commit)
         return donne
     except Exception as e:
         session.rollback()
         raise e
 
-def create_commande(session: Session, client_id, produit_id, nb_produit):
+@en_ecriture
+def create_commande(session: Session, client_id, produit_id, nb_produit, commit=True):
     """Create and persist a new order (Commande) in the database, optionally applying a promotion.
 
-    The function looks for a promotion associated with the given product — 
+    The function looks for the best promotion of the given product in the client's region —
     if found, the order will reference the promotion; otherwise, no promotion is applied.
+    The order is timestamped (`date_commande`); the best-seller leaderboards (`classements`)
+    and the daily / monthly sales rollups are updated in the same transaction.
 
     Args:
         client_id (int): ID of the client placing the order.
         produit_id (int): ID of the product being ordered.
         nb_produit (int): Number of units ordered.
+        commit (bool, optional): If False, only flush; the caller commits the batch.
 
     Raises:
         Exception: If the session commit fails. The session will be rolled back and the exception re-raised.
     """
     try:
-        promo = session.query(Promotion).filter(Promotion.produit_id==produit_id).first()
-        promo_id = promo.promotion_id if promo else 0
-        session.add(Commande(
+        region_id = session.query(Client.region_id).filter(Client.client_id==client_id).scalar()
+        promo = (
+            session.query(Promotion)
+            .join(promotions_regions)
+            .filter(Promotion.produit_id==produit_id, promotions_regions.c.region_id==region_id)
+            .order_by(Promotion.promotion_percent.desc())
+            .first()
+        )
+        promo_id = promo.promotion_id if promo else None
+        commande = Commande(
             client_id = client_id,
             produit_id = produit_id,
             nb_produit = nb_produit,
-            promotion_id = promo_id
-            ))
-        session.commit()
+            promotion_id = promo_id,
+            date_commande = maintenant()
+            )
+        session.add(commande)
+        session.flush()
+        _repercuter_commandes(session, [commande.commande_id])
+        _valider(session, commit)
     except Exception as e:
         session.rollback()
         raise e
     
-def create_promotion(session: Session, produit_id:int, promotion_percent:int, region_id_promo:list):
+@en_ecriture
+def create_promotion(session: Session, produit_id:int, promotion_percent:int, region_id_promo:list, commit=True):
     """Create a promotion for a given product and link it to a region.
 
     Args:
         produit_id (int): ID of the product.
         promotion_percent (int): Discount percent.
         region_id_promo (int): ID of the region for this promotion.
+        commit (bool, optional): If False, only flush; the caller commits the batch.
 
     Raises:
         Exception: If commit fails, the session is rolled back and the exception re-raised.
@@ -111,14 +215,70 @@ def create_promotion(session: Session, produit_id:int, promotion_percent:int, re
             obj.regions.append(region)
 
         
-        session.commit()
+        _valider(session, commit)
+    except Exception as e:
+        session.rollback()
+        raise e
+
+@en_ecriture
+def create_lignes(session: Session, table_class, lignes, commit=True):
+    """Insère en masse une liste de lignes dans une table (import CSV / JSON-lines).
+
+    Args:
+        table_class: Modèle SQLAlchemy cible (ex.: Commande, Produit).
+        lignes (list[dict]): Une entrée par ligne, clés = noms de colonnes.
+        commit (bool, optional): Si False, simple flush ; l'appelant valide le lot.
+
+    Behavior:
+        - Pour `Commande`, les lignes sans `promotion_id` reçoivent la meilleure promotion
+          de la région du client, calculée en une passe par `MoteurPrix`, et les lignes sans
+          `date_commande` reçoivent l'heure de l'import.
+
+    Returns:
+        int: Nombre de lignes insérées.
+
+    Raises:
+        Exception: En cas d'erreur, la transaction est annulée (rollback) et l'exception est levée.
+    """
+    try:
+        if lignes and table_class is Commande:
+            lignes = _preparer_commandes(session, lignes)
+            # classements et agrégats de ventes mis à jour dans la même transaction
+            ids = session.execute(insert(Commande).returning(Commande.commande_id), lignes).scalars().all()
+            _repercuter_commandes(session, ids)
+        elif lignes:
+            session.execute(insert(table_class), lignes)
+        _valider(session, commit)
+        return len(lignes)
     except Exception as e:
         session.rollback()
         raise e
 
+def _preparer_commandes(session: Session, lignes):
+    lignes = [dict(ligne) for ligne in lignes]
+    date_import = maintenant()
+    for ligne in lignes:
+        if ligne.get("date_commande") is None:
+            ligne["date_commande"] = date_import
+        _lire_dates(Commande, ligne)
+    a_tarifer = [ligne for ligne in lignes if "promotion_id" not in ligne]
+    if not a_tarifer:
+        return lignes
+    from components.tarification import MoteurPrix
+
+    moteur = MoteurPrix.charger(session, produits=False)
+    promotion_ids, _ = moteur.promotions_applicables(
+        [int(ligne["client_id"]) for ligne in a_tarifer],
+        [int(ligne["produit_id"]) for ligne in a_tarifer],
+    )
+    for ligne, promotion_id in zip(a_tarifer, promotion_ids.tolist()):
+        ligne["promotion_id"] = promotion_id or None
+    return lignes
+
 # READ
 
-def read_table(session: Session, table_class, limit=None, filter_exp=None):
+@en_lecture
+def read_table(session: Session, table_class, limit=None, filter_exp=None, compact=False):
     """
     Lit une table SQLAlchemy et renvoie les résultats dans un DataFrame.
 
@@ -126,6 +286,7 @@ def read_table(session: Session, table_class, limit=None, filter_exp=None):
         table_class: Modèle SQLAlchemy (ex.: Client, Commande).
         limit: Nombre maximum de lignes à retourner (optionnel).
         filter_exp: Expression SQLAlchemy pour filtrer (optionnel).
+        compact: Si True, réduit les types numériques et catégorise le texte (optionnel).
 
     Returns:
         DataFrame contenant le résultat de la requête.
@@ -134,15 +295,28 @@ def read_table(session: Session, table_class, limit=None, filter_exp=None):
         Exception: If commit fails, the session is rolled back and the exception re-raised.
     """
 
+    import pandas as pd
+
     try:
         query = session.query(table_class)
         
         if table_class is Client:
-            query.update(
-            {Client.date_derniere_utilisation: func.now()},
-            synchronize_session=False
-            )
-            session.commit()
+            routeur = session.info.get("routeur")
+            if routeur is not None:
+                # la session de lecture est en query_only : la mise à jour passe par l'écrivain
+                # (aucune mise à jour sur un instantané ouvert en lecture seule)
+                if not routeur.lecture_seule:
+                    with routeur.ecriture() as session_ecriture:
+                        session_ecriture.query(Client).update(
+                        {Client.date_derniere_utilisation: func.now()},
+                        synchronize_session=False
+                        )
+            else:
+                query.update(
+                {Client.date_derniere_utilisation: func.now()},
+                synchronize_session=False
+                )
+                session.commit()
 
         if filter_exp is not None:
             query = query.filter(filter_exp)
@@ -150,7 +324,10 @@ def read_table(session: Session, table_class, limit=None, filter_exp=None):
         if limit is not None:
             query = query.limit(limit)
         
-        df = pd.read_sql(query.statement, session.get_bind())
+        df = pd.read_sql(query.statement, session.connection())
+        if compact:
+            from components.compact import compacter_df
+            compacter_df(df)
         return df
     
     except Exception as e:
@@ -158,7 +335,8 @@ def read_table(session: Session, table_class, limit=None, filter_exp=None):
         raise e
 
 
-def read_promo(session: Session, limit=None, filter_exp=None):
+@en_lecture
+def read_promo(session: Session, limit=None, filter_exp=None, compact=False):
     """Interroger les promotions avec les noms des produits et les régions associées.
     Cette fonction retourne un DataFrame contenant les promotions jointes aux produits,
     ainsi qu'une chaîne formatée listant les régions pour chaque promotion.
@@ -166,6 +344,7 @@ def read_promo(session: Session, limit=None, filter_exp=None):
     Args:
         limit (int, optional): Nombre maximal de lignes à retourner.
         filter_exp (expression SQLAlchemy, optional): Expression de filtrage à appliquer.
+        compact (bool, optional): Si True, renvoie un DataFrame compacté (voir `compacter_df`).
 
     Returns:
         tuple:
@@ -176,6 +355,8 @@ def read_promo(session: Session, limit=None, filter_exp=None):
         Exception: Toute exception levée pendant l'exécution de la requête est capturée et réémise.
     """
 
+    import pandas as pd
+
     try:
         query = (session.query(
             Promotion,
@@ -187,7 +368,10 @@ def read_promo(session: Session, limit=None, filter_exp=None):
         if limit is not None:
             query = query.limit(limit)
 
-        df = pd.read_sql(query.statement, session.get_bind(), index_col="promotion_id")
+        df = pd.read_sql(query.statement, session.connection(), index_col="promotion_id")
+        if compact:
+            from components.compact import compacter_df
+            compacter_df(df)
         
         list_reg = ""
         for promo, prod_name in query:
@@ -199,7 +383,8 @@ def read_promo(session: Session, limit=None, filter_exp=None):
     except Exception as e:
         raise e
 
-def read_produit(session: Session, limit=None, filter_exp=None):
+@en_lecture
+def read_produit(session: Session, limit=None, filter_exp=None, compact=False):
     """Interroger les produits avec leurs informations détaillées.
 
     Cette fonction retourne un DataFrame contenant les produits et les informations
@@ -208,6 +393,7 @@ def read_produit(session: Session, limit=None, filter_exp=None):
     Args:
         limit (int, optional): Nombre maximal de lignes à retourner.
         filter_exp (expression SQLAlchemy, optional): Expression de filtrage à appliquer.
+        compact (bool, optional): Si True, renvoie un DataFrame compacté (voir `compacter_df`).
 
     Returns:
         pandas.DataFrame: Résultats de la requête avec les détails des produits.
@@ -216,6 +402,8 @@ def read_produit(session: Session, limit=None, filter_exp=None):
         Exception: Toute exception levée pendant l'exécution de la requête est réémise.
     """
 
+    import pandas as pd
+
     try:
         query = (
             session.query(
@@ -236,22 +424,29 @@ def read_produit(session: Session, limit=None, filter_exp=None):
         if limit is not None:
             query = query.limit(limit)
         
-        df = pd.read_sql(query.statement, session.get_bind())
+        df = pd.read_sql(query.statement, session.connection())
 
+        if compact:
+            from components.compact import compacter_df
+            compacter_df(df)
         return df
     except Exception as e:
         raise e
 
 
-def read_command(session: Session, limit=None, filter_exp=None):
+@en_lecture
+def read_command(session: Session, limit=None, filter_exp=None, compact=False):
     """Interroger les commandes avec les informations sur le produit et la promotion.
 
     Cette fonction retourne un DataFrame contenant les commandes, le nombre de produits,
     le nom du produit et le pourcentage de promotion s'il existe.
+    La remise est celle de la promotion enregistrée sur la commande (`Commande.promotion_id`) ;
+    le prix total est calculé en une passe par `MoteurPrix`.
 
     Args:
         limit (int, optional): Nombre maximal de lignes à retourner.
         filter_exp (expression SQLAlchemy, optional): Expression de filtrage à appliquer.
+        compact (bool, optional): Si True, renvoie un DataFrame compacté (voir `compacter_df`).
 
     Returns:
         pandas.DataFrame: Résultats de la requête avec les détails des commandes.
@@ -260,17 +455,24 @@ def read_command(session: Session, limit=None, filter_exp=None):
         Exception: Toute exception levée pendant l'exécution de la requête est réémise.
     """
      
+    import numpy as np
+    import pandas as pd
+    from components.compact import prix_total
+    from components.tarification import MoteurPrix
+
     try:
         query = (session.query(
             Commande.commande_id,
             Commande.nb_produit,
             Commande.client_id,
+            Commande.promotion_id,
             Produit.name.label("produit_nom"),
             Produit.prix.label("prix"),
-            Promotion.promotion_percent,
             )
         .join(Produit, Produit.produit_id == Commande.produit_id)
-        .outerjoin(Promotion, Promotion.produit_id == Commande.produit_id)
+        # jointure sur la clé primaire de la promotion : une ligne par commande,
+        # disponible pour les filtres (ex. Promotion.promotion_percent > 10)
+        .outerjoin(Promotion, Promotion.promotion_id == Commande.promotion_id)
         )
         
         if filter_exp is not None:
@@ -278,15 +480,23 @@ def read_command(session: Session, limit=None, filter_exp=None):
         if limit is not None:
             query = query.limit(limit)
 
-        df = pd.read_sql(query.statement, session.get_bind())
-        df["promotion_percent"] = df["promotion_percent"].fillna(0)
-        df['prix total'] = df["nb_produit"] * df["prix"] * (1 - (0.01 * df["promotion_percent"]))
+        df = pd.read_sql(query.statement, session.connection())
+
+        # remise de la promotion enregistrée sur la commande, calculée par le moteur de prix
+        moteur = MoteurPrix.charger(session, produits=False, clients=False)
+        df.insert(5, "promotion_percent", moteur.remise_commandes(df.pop("promotion_id")))
+        if compact:
+            from components.compact import compacter_df
+            compacter_df(df)
+        df['prix total'] = prix_total(df["nb_produit"], df["prix"], df["promotion_percent"],
+                                      dtype=np.float32 if compact else np.float64)
         return df
     
     except Exception as e:
         raise e
 
-def read_client(session: Session, limit=None, filter_exp=None):
+@en_lecture
+def read_client(session: Session, limit=None, filter_exp=None, compact=False):
     """
     Récupère les informations des clients avec les données associées et le nombre de commandes.
 
@@ -294,6 +504,7 @@ def read_client(session: Session, limit=None, filter_exp=None):
         limit (int, optional): Nombre maximum de clients à récupérer. Par défaut, None = tous.
         filter_exp (Expression, optional): Expression SQLAlchemy pour filtrer les clients.
                                            Exemple : Client.region_id == 0
+        compact (bool, optional): Si True, renvoie un DataFrame compacté (voir `compacter_df`).
 
     Behavior:
         - Joint les tables Age et Region pour récupérer les informations associées.
@@ -308,6 +519,8 @@ def read_client(session: Session, limit=None, filter_exp=None):
             - region_nom
             - Nb_commande
     """
+    import pandas as pd
+
     try:
         query = (
             (session.query(
@@ -328,8 +541,11 @@ def read_client(session: Session, limit=None, filter_exp=None):
             query = query.limit(limit)  
 
         
-        df = pd.read_sql(query.statement, session.get_bind(), index_col="client_id")
+        df = pd.read_sql(query.statement, session.connection(), index_col="client_id")
 
+        if compact:
+            from components.compact import compacter_df
+            compacter_df(df)
         return df
     
     except Exception as e:
@@ -338,18 +554,25 @@ def read_client(session: Session, limit=None, filter_exp=None):
 
 # UPDATE
 
-def update_table(session: Session, table_nom, data_id, **kwargs):
+@en_ecriture
+def update_table(session: Session, table_nom, data_id, commit=True, **kwargs):
     """
     Met à jour les colonnes spécifiées d'un enregistrement dans une table SQLAlchemy.
 
     Args:
         table_nom (DeclarativeMeta): La classe SQLAlchemy représentant la table.
         data_id (int): L'identifiant de l'enregistrement à mettre à jour.
+        commit (bool, optional): Si False, simple flush ; l'appelant valide le lot.
         **kwargs: Paires clé-valeur représentant les colonnes à modifier et leurs nouvelles valeurs.
-                  Exemple : age_id=1, region_id=0
+                  Exemple : age_id=1, region_id=0. Les dates peuvent être des chaînes ISO
+                  (ex.: date_commande="2026-03-15T10:00:00").
 
     Behavior spécifique:
         - Si la table est `Client`, la colonne `date_derniere_utilisation` sera mise à jour avec l'heure actuelle.
+        - Si la table est `Commande`, ou si une colonne dont ils dépendent change
+          (`Client.region_id`, `Produit.prix` / `genre_cod` / `platform_cod`,
+          `Promotion.promotion_percent`), les classements et agrégats de ventes des commandes
+          concernées sont corrigés (anciennes lignes retirées, nouvelles ajoutées).
 
     Returns:
         None si l'objet avec `data_id` n'existe pas. Sinon, commit les changements dans la base de données.
@@ -360,34 +583,50 @@ def update_table(session: Session, table_nom, data_id, **kwargs):
     obj = session.get(table_nom, data_id)
     if not obj:
         return None
+
+    _lire_dates(table_nom, kwargs)
+    commandes = _commandes_concernees(session, table_nom, [data_id], kwargs)
+    if commandes:
+        _repercuter_commandes(session, commandes, signe=-1)
     
     for field, value in kwargs.items():
         setattr(obj, field, value)
     
+    if commandes:
+        session.flush()
+        _repercuter_commandes(session, commandes)
 
     if table_nom is Client:
         obj.date_derniere_utilisation = func.now()
         
-    session.commit()
+    _valider(session, commit)
     print(f"L’enregistrement dans {table_nom.__tablename__} a été renouvelé.")
 
 
 
 # DELETE
 
-def delete_objet(session: Session, table_nom, data_id):
+@en_ecriture
+def delete_objet(session: Session, table_nom, data_id, commit=True):
     """
     Supprime un enregistrement spécifique d'une table SQLAlchemy.
 
     Args:
         table_nom (DeclarativeMeta): La classe SQLAlchemy représentant la table.
         data_id (int): L'identifiant de l'enregistrement à supprimer.
+        commit (bool, optional): Si False, simple flush ; l'appelant valide le lot.
 
     Behavior:
         - Cherche l'objet dans la base via `session.get`.
         - Si l'objet existe, le supprime et commit la transaction.
+        - Pour une `Commande`, la retire d'abord des classements et agrégats de ventes.
+        - Pour un `Client`, un `Produit` ou une `Promotion`, retire d'abord ses commandes,
+          puis réapplique celles qui restent visibles (ex.: commandes d'une promotion supprimée,
+          désormais sans remise).
         - Si l'objet n'existe pas, aucune suppression n'est effectuée.
-        - Capture les exceptions et affiche un message d'erreur.
+
+    Raises:
+        Exception: En cas d'erreur, la transaction est annulée (rollback) et l'exception est levée.
 
     Returns:
         None
@@ -398,24 +637,39 @@ def delete_objet(session: Session, table_nom, data_id):
     try:
         obj = session.get(table_nom, data_id)
         if obj is not None:
+            commandes = _commandes_concernees(session, table_nom, [data_id])
+            if commandes:
+                _repercuter_commandes(session, commandes, signe=-1)
             session.delete(obj)
-        session.commit()
+            if commandes and table_nom is not Commande:
+                session.flush()
+                _repercuter_commandes(session, commandes)
+        _valider(session, commit)
     except Exception as e:
-        print(e)
+        session.rollback()
+        raise e
 
-def delete_filtre(session: Session, table_nom, filter_exp):
+@en_ecriture
+def delete_filtre(session: Session, table_nom, filter_exp, commit=True):
     """
     Supprime tous les enregistrements d'une table SQLAlchemy correspondant à un filtre donné.
 
     Args:
         table_nom (DeclarativeMeta): La classe SQLAlchemy représentant la table.
         filter_exp: Expression de filtre SQLAlchemy pour sélectionner les enregistrements à supprimer.
-                    Exemple : Client.age_id == 1
+                    Exemple : Client.age_id == 1, ou Client.region_id == 1 pour `Commande`
+                    (les tables liées par clé étrangère sont jointes).
+        commit (bool, optional): Si False, simple flush ; l'appelant valide le lot.
 
     Behavior:
-        - Crée une requête avec `session.query(table_nom).filter(filter_exp)`.
-        - Supprime tous les enregistrements filtrés via `.delete()`.
-        - Capture les exceptions et affiche un message d'erreur.
+        - Lit les IDs (sans doublon) des enregistrements filtrés.
+        - Pour `Commande`, retire d'abord les commandes filtrées des classements et agrégats de ventes ;
+          pour `Client`, `Produit` et `Promotion`, leurs commandes (comme `delete_objet`).
+        - Supprime les enregistrements par ID, par lots.
+
+    Raises:
+        ValueError: Si le filtre cite une table sans lien direct avec `table_nom`.
+        Exception: En cas d'erreur, la transaction est annulée (rollback) et l'exception est levée.
 
     Returns:
         None
@@ -424,16 +678,27 @@ def delete_filtre(session: Session, table_nom, filter_exp):
         delete_filtre(Client, Client.age_id == 1)
     """
     try:
-        query = session.query(table_nom).filter(filter_exp)
-        query.delete(synchronize_session=False)
-        session.commit()
+        cle = inspect(table_nom).primary_key[0]
+        ids = _ids_filtre(session, table_nom, filter_exp)
+        commandes = _commandes_concernees(session, table_nom, ids)
+        if commandes:
+            _repercuter_commandes(session, commandes, signe=-1)
+        for lot in par_lots(ids):
+            session.execute(delete(table_nom).where(cle.in_(lot)),
+                            execution_options={"synchronize_session": False})
+        if commandes and table_nom is not Commande:
+            session.flush()
+            _repercuter_commandes(session, commandes)
+        _valider(session, commit)
 
     except Exception as e:
-        print(e)
+        session.rollback()
+        raise e
 
 # LOGGING
 
-def add_log(session: Session, type_action, table_cible, client_id=None, details=None):
+@en_ecriture
+def add_log(session: Session, type_action, table_cible, client_id=None, details=None, commit=True):
     """Ajoute une entrée dans la table des logs.
 
     Args:
@@ -442,6 +707,7 @@ def add_log(session: Session, type_action, table_cible, client_id=None, details=
         table_cible (str): nom de la table concernée par l'action
         client_id (int, optionnel): identifiant du client ou de l'utilisateur effectuant l'action
         details (str, optionnel): informations complémentaires, par exemple au format JSON
+        commit (bool, optionnel): si False, simple flush ; l'appelant valide le lot
 
     Raises:
         Exception: en cas d'erreur lors de l'insertion dans la table logs,
@@ -456,7 +722,7 @@ def add_log(session: Session, type_action, table_cible, client_id=None, details=
             details=details
         )
         session.add(log_entry)
-        session.commit()
+        _valider(session, commit)
     except Exception as e:
         session.rollback()
         raise e
\ No newline at end of file
@@ -1,6 +1,6 @@
 # import
 
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Table
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Float, ForeignKey, Table, Index, inspect
 from sqlalchemy.orm import relationship, declarative_base
 from sqlalchemy.sql import func
 
@@ -135,6 +135,7 @@ class Commande(Base):
     client_id = Column(Integer, ForeignKey("clients.client_id"))
     produit_id = Column(Integer, ForeignKey("produits.produit_id"))
     promotion_id = Column(Integer, ForeignKey("promotions.promotion_id"), nullable=True)
+    date_commande = Column(DateTime(timezone=True), server_default=func.now(), index=True)
     #relations
     client = relationship("Client", back_populates="commandes")
     produit = relationship("Produit", back_populates="commande")
@@ -149,4 +150,81 @@ class Log(Base):
     type_action = Column(String)
     table_cible = Column(String)
     client_id = Column(Integer)
-    details = Column(String, nullable=True)
\ No newline at end of file
+    details = Column(String, nullable=True)
+
+# Classements (meilleures ventes par région / genre / plateforme)
+
+class Classement(Base):
+    __tablename__ = "classements"
+    dimension = Column(String, primary_key=True)       # "region", "genre" ou "platform"
+    dimension_id = Column(Integer, primary_key=True)   # region_id, genre_cod ou platform_cod
+    produit_id = Column(Integer, ForeignKey("produits.produit_id"), primary_key=True)
+    unites = Column(Integer, nullable=False, default=0)
+    revenu = Column(Float, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_classements_unites", "dimension", "dimension_id", "unites"),
+        Index("ix_classements_revenu", "dimension", "dimension_id", "revenu"),
+    )
+
+class Generation(Base):
+    """Compteur incrémenté à chaque écriture de `classements` : les processus comparent
+    sa valeur à celle de leur cache mémoire pour détecter les écritures faites ailleurs."""
+    __tablename__ = "generations"
+    nom = Column(String, primary_key=True)              # ex.: "classements"
+    valeur = Column(Integer, nullable=False, default=0)
+
+
+# Empreintes du catalogue (import incrémental de vgsales.csv)
+
+class EmpreinteProduit(Base):
+    __tablename__ = "empreintes_produits"
+    produit_id = Column(Integer, ForeignKey("produits.produit_id"), primary_key=True)
+    cle = Column(String, unique=True, nullable=False)    # hash de (Name, Platform, Year, Publisher)
+    empreinte = Column(String, nullable=False)           # hash des attributs importés
+
+
+# Agrégats de ventes par jour et par mois (produit, région, promotion ; promotion_id 0 = aucune)
+
+class VenteJour(Base):
+    __tablename__ = "ventes_jours"
+    jour = Column(String, primary_key=True)            # "AAAA-MM-JJ"
+    produit_id = Column(Integer, ForeignKey("produits.produit_id"), primary_key=True)
+    region_id = Column(Integer, primary_key=True)
+    promotion_id = Column(Integer, primary_key=True)
+    unites = Column(Integer, nullable=False, default=0)
+    revenu = Column(Float, nullable=False, default=0)
+
+class VenteMois(Base):
+    __tablename__ = "ventes_mois"
+    mois = Column(String, primary_key=True)            # "AAAA-MM"
+    produit_id = Column(Integer, ForeignKey("produits.produit_id"), primary_key=True)
+    region_id = Column(Integer, primary_key=True)
+    promotion_id = Column(Integer, primary_key=True)
+    unites = Column(Integer, nullable=False, default=0)
+    revenu = Column(Float, nullable=False, default=0)
+
+
+VERSION_SCHEMA = 1   # PRAGMA user_version d'une base migrée par RouteurSessions.migrer
+
+
+def version_schema(conn):
+    """Version du schéma d'une base (`PRAGMA user_version`, 0 pour une base jamais migrée)."""
+    return conn.exec_driver_sql("PRAGMA user_version").scalar()
+
+
+def initialiser_schema(engine):
+    """Crée les tables manquantes, ajoute les colonnes manquantes des tables existantes
+    et retourne la liste des tables nouvellement créées."""
+    existantes = set(inspect(engine).get_table_names())
+    Base.metadata.create_all(engine)
+
+    colonnes = {c["name"] for c in inspect(engine).get_columns("commandes")}
+    if "date_commande" not in colonnes:
+        # SQLite refuse un DEFAULT non constant dans ALTER TABLE : les commandes existantes restent sans date
+        with engine.begin() as conn:
+            conn.exec_driver_sql("ALTER TABLE commandes ADD COLUMN date_commande DATETIME")
+            conn.exec_driver_sql(
+                "CREATE INDEX IF NOT EXISTS ix_commandes_date_commande ON commandes (date_commande)"
+            )
+    return [t for t in Base.metadata.tables if t not in existantes]
@@ -0,0 +1,191 @@
+# import
+import functools
+import os
+import threading
+from contextlib import contextmanager
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+
+class RouteurSessions:
+    """Route les sessions SQLAlchemy vers un moteur d'écriture unique ou un pool de lecture.
+
+    - Écriture : un seul moteur, une seule connexion (SQLite n'accepte qu'un écrivain),
+      base passée en mode WAL pour que les lectures ne bloquent pas les écritures.
+    - Lecture : un pool de connexions ouvertes en lecture seule (`mode=ro`, `PRAGMA query_only`).
+      Chaque session de lecture ouvre une transaction explicite et voit donc un instantané
+      WAL cohérent jusqu'à sa fermeture.
+
+    Les sessions sont courtes (une par opération) : la carte d'identité est vidée à chaque
+    fermeture et la mémoire reste stable pendant une longue session d'administration.
+
+    Ouvrir un routeur n'écrit rien : le schéma est mis à jour par `migrer()`, appelée
+    explicitement ou avant la première écriture. Une lecture ne migre jamais la base.
+
+    Args:
+        db_path (str): Chemin du fichier SQLite.
+        taille_pool_lecture (int, optional): Nombre de connexions de lecture. Par défaut 4.
+        busy_timeout_ms (int, optional): Attente maximale sur un verrou, en millisecondes.
+        lecture_seule (bool, optional): Si True, aucun moteur d'écriture n'est créé et
+            `ecriture()` lève une erreur (ex.: ouverture d'un instantané).
+        immuable (bool, optional): Si True (avec `lecture_seule`), le fichier est ouvert avec
+            `immutable=1` : aucun verrou ni fichier -wal/-shm. Réservé aux fichiers qui ne changent
+            plus, comme une sauvegarde.
+
+    Exemple:
+        routeur = RouteurSessions("BD_Ventes_de_jeux_video.db")
+        create_commande(routeur, 1, 2, 3)       # moteur d'écriture
+        df = read_command(routeur, limit=100)   # pool de lecture
+    """
+
+    def __init__(self, db_path, taille_pool_lecture=4, busy_timeout_ms=5000, lecture_seule=False,
+                 immuable=False):
+        if immuable and not lecture_seule:
+            raise ValueError("immuable=True exige lecture_seule=True.")
+        self.db_path = os.path.abspath(db_path)
+        self.lecture_seule = lecture_seule
+        self.busy_timeout_ms = busy_timeout_ms
+
+        self.moteur_ecriture = None
+        self._SessionEcriture = None
+        self._schema_verifie = False
+        self._verrou_schema = threading.Lock()
+        if not lecture_seule:
+            self.moteur_ecriture = create_engine(
+                f"sqlite:///{self.db_path}",
+                pool_size=1,
+                max_overflow=0,
+                connect_args={"check_same_thread": False, "timeout": busy_timeout_ms / 1000},
+            )
+            event.listen(self.moteur_ecriture, "connect", self._configurer_ecriture)
+            self._SessionEcriture = sessionmaker(bind=self.moteur_ecriture, expire_on_commit=False)
+
+        options = "mode=ro&immutable=1" if immuable else "mode=ro"
+        self.moteur_lecture = create_engine(
+            f"sqlite:///file:{self.db_path}?{options}&uri=true",
+            pool_size=taille_pool_lecture,
+            max_overflow=0,
+            connect_args={"check_same_thread": False, "timeout": busy_timeout_ms / 1000},
+        )
+        event.listen(self.moteur_lecture, "connect", self._configurer_lecture)
+        event.listen(self.moteur_lecture, "begin", lambda conn: conn.exec_driver_sql("BEGIN"))
+        self._SessionLecture = sessionmaker(bind=self.moteur_lecture)
+
+    def migrer(self):
+        """Met le schéma à jour si `PRAGMA user_version` est en retard sur `VERSION_SCHEMA`.
+
+        Crée les tables et colonnes manquantes, reconstruit les classements et agrégats de
+        ventes, puis enregistre la version : une base à jour n'est plus jamais migrée.
+        Passe aussi la base en WAL (connexion d'écriture).
+
+        Returns:
+            list[str]: Tables créées (vide si la base était déjà à jour).
+
+        Raises:
+            PermissionError: Si le routeur est en lecture seule.
+        """
+        if self._SessionEcriture is None:
+            raise PermissionError(f"{self.db_path} est ouverte en lecture seule.")
+        from components.models import VERSION_SCHEMA, initialiser_schema, version_schema
+
+        with self._verrou_schema:
+            if self._schema_verifie:
+                return []
+            with self.moteur_ecriture.connect() as conn:
+                version = version_schema(conn)
+            nouvelles = []
+            if version < VERSION_SCHEMA:
+                from components.classement import reconstruire_classements
+                from components.ventes import reconstruire_ventes
+
+                nouvelles = initialiser_schema(self.moteur_ecriture)
+                with self._session_ecriture() as session:
+                    reconstruire_classements(session)
+                with self._session_ecriture() as session:
+                    reconstruire_ventes(session)
+                # version enregistrée en dernier : une migration interrompue est reprise en entier
+                with self.moteur_ecriture.begin() as conn:
+                    conn.exec_driver_sql(f"PRAGMA user_version = {int(VERSION_SCHEMA)}")
+            self._schema_verifie = True
+            return nouvelles
+
+    def schema_a_jour(self):
+        """True si la base est migrée (lu sur le pool de lecture, sans rien écrire)."""
+        from components.models import VERSION_SCHEMA, version_schema
+
+        with self.moteur_lecture.connect() as conn:
+            return version_schema(conn) >= VERSION_SCHEMA
+
+    def _configurer_ecriture(self, dbapi_conn, _record):
+        cursor = dbapi_conn.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        cursor.close()
+
+    def _configurer_lecture(self, dbapi_conn, _record):
+        # transactions gérées à la main (événement "begin") pour figer l'instantané WAL
+        dbapi_conn.isolation_level = None
+        cursor = dbapi_conn.cursor()
+        cursor.execute("PRAGMA query_only=ON")
+        cursor.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        cursor.close()
+
+    @contextmanager
+    def ecriture(self):
+        """Session courte sur le moteur d'écriture : commit à la sortie, rollback en cas d'erreur.
+
+        La première écriture d'un routeur migre le schéma si besoin (`migrer`).
+        """
+        if self._SessionEcriture is None:
+            raise PermissionError(f"{self.db_path} est ouverte en lecture seule.")
+        if not self._schema_verifie:
+            self.migrer()
+        with self._session_ecriture() as session:
+            yield session
+
+    @contextmanager
+    def _session_ecriture(self):
+        session = self._SessionEcriture(info={"routeur": self})
+        try:
+            yield session
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    @contextmanager
+    def lecture(self):
+        """Session courte sur le pool de lecture ; l'instantané est libéré à la fermeture."""
+        session = self._SessionLecture(info={"routeur": self})
+        try:
+            yield session
+        finally:
+            session.close()
+
+    def dispose(self):
+        """Ferme toutes les connexions des deux moteurs."""
+        if self.moteur_ecriture is not None:
+            self.moteur_ecriture.dispose()
+        self.moteur_lecture.dispose()
+
+
+def _router(mode):
+    def decorateur(fonction):
+        @functools.wraps(fonction)
+        def wrapper(session, *args, **kwargs):
+            if isinstance(session, RouteurSessions):
+                contexte = session.lecture() if mode == "lecture" else session.ecriture()
+                with contexte as s:
+                    return fonction(s, *args, **kwargs)
+            return fonction(session, *args, **kwargs)
+        return wrapper
+    return decorateur
+
+
+# Décorateurs pour les fonctions CRUD : acceptent une Session ou un RouteurSessions
+en_lecture = _router("lecture")
+en_ecriture = _router("ecriture")
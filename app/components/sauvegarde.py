@@ -0,0 +1,270 @@
+# import
+import hashlib
+import os
+import sqlite3
+import time
+
+from components.routeur import RouteurSessions
+
+
+MODES_CHECKPOINT = ("PASSIVE", "FULL", "RESTART", "TRUNCATE")
+TAILLE_BLOC = 1024 * 1024   # lecture du fichier par blocs de 1 Mo pour le checksum
+
+
+class _TropDeRedemarrages(Exception):
+    pass
+
+
+def _chemin(base):
+    """Accepte un chemin ou un RouteurSessions."""
+    return base.db_path if isinstance(base, RouteurSessions) else os.path.abspath(base)
+
+
+def sha256_fichier(chemin):
+    """Calcule le SHA-256 d'un fichier, lu par blocs (mémoire constante)."""
+    h = hashlib.sha256()
+    with open(chemin, "rb") as f:
+        for bloc in iter(lambda: f.read(TAILLE_BLOC), b""):
+            h.update(bloc)
+    return h.hexdigest()
+
+
+def verifier_sauvegarde(chemin):
+    """Compare une sauvegarde à son fichier `.sha256`.
+
+    Returns:
+        str: Le checksum.
+
+    Raises:
+        FileNotFoundError: Si la sauvegarde n'a pas de fichier `.sha256` (rien à vérifier).
+        ValueError: Si le fichier a été modifié depuis la sauvegarde.
+    """
+    fichier = chemin + ".sha256"
+    if not os.path.exists(fichier):
+        raise FileNotFoundError(f"Pas de fichier {fichier} : impossible de vérifier la sauvegarde "
+                                "(désactiver la vérification pour passer outre).")
+    with open(fichier, encoding="utf-8") as f:
+        attendu = f.read().split()[0]
+    calcule = sha256_fichier(chemin)
+    if calcule != attendu:
+        raise ValueError(f"Checksum invalide pour {chemin} : {calcule} au lieu de {attendu}")
+    return calcule
+
+
+def sauvegarder(source, destination, pages_par_etape=1024, pause=0.0, checkpoint=None,
+                verifier=False, max_redemarrages=3, busy_timeout_ms=5000):
+    """Sauvegarde à chaud d'une base SQLite avec l'API de backup, par étapes de `pages_par_etape` pages.
+
+    Entre deux étapes, aucun verrou n'est gardé sur la source : l'écrivain n'attend jamais plus
+    d'une étape. Si la source est modifiée par une autre connexion, SQLite reprend la copie depuis
+    le début. En mode WAL, après `max_redemarrages` reprises, la copie est terminée en une seule
+    étape : elle ne tient qu'un instantané de lecture et ne bloque pas les écritures.
+    Avec un journal classique (DELETE, TRUNCATE...), cette étape garderait un verrou SHARED pendant
+    toute la copie et bloquerait les commits : la copie continue alors par étapes bornées, quel
+    que soit le nombre de reprises (`RouteurSessions` passe la base en WAL).
+
+    La copie est écrite dans `destination + ".partiel"` puis renommée : une sauvegarde présente
+    sur le disque est toujours complète. Elle est autonome (journal DELETE, sans fichier -wal) et
+    accompagnée d'un fichier `.sha256` au format de `sha256sum`.
+
+    Args:
+        source (str | RouteurSessions): Base à sauvegarder.
+        destination (str): Fichier de sauvegarde (remplacé s'il existe).
+        pages_par_etape (int, optional): Pages copiées par étape. Par défaut 1024 (4 Mo avec des pages de 4 Ko).
+        pause (float, optional): Pause entre deux étapes, en secondes. Par défaut 0.
+        checkpoint (str, optional): Mode de `PRAGMA wal_checkpoint` à lancer avant la copie
+            ("PASSIVE", "FULL", "RESTART" ou "TRUNCATE"). Par défaut aucun.
+        verifier (bool, optional): Si True, lance `PRAGMA quick_check` sur la copie.
+        max_redemarrages (int, optional): Reprises tolérées avant de finir en une étape (mode WAL uniquement).
+        busy_timeout_ms (int, optional): Attente maximale sur un verrou, en millisecondes.
+
+    Returns:
+        dict: Rapport `source`, `destination`, `journal_mode`, `pages`, `octets`, `etapes`, `redemarrages`,
+            `une_etape`, `etape_max_ms`, `checkpoint`, `integrite`, `sha256`, `duree_s`, `debit_mo_s`.
+
+    Raises:
+        ValueError: Si le mode de checkpoint est inconnu ou si la copie est corrompue.
+        FileNotFoundError: Si la source n'existe pas (elle n'est jamais créée).
+
+    Exemple:
+        rapport = sauvegarder(routeur, "sauvegardes/ventes.db", checkpoint="PASSIVE")
+    """
+    debut = time.perf_counter()
+    source = _chemin(source)
+    destination = os.path.abspath(destination)
+    partiel = destination + ".partiel"
+    if checkpoint is not None and checkpoint.upper() not in MODES_CHECKPOINT:
+        raise ValueError(f"Mode de checkpoint inconnu : {checkpoint} (attendu : {', '.join(MODES_CHECKPOINT)})")
+
+    for fichier in (partiel, partiel + "-wal", partiel + "-shm"):
+        if os.path.exists(fichier):
+            os.remove(fichier)
+
+    rapport = {"source": source, "destination": destination, "checkpoint": None, "integrite": None}
+    etat = {"etapes": 0, "redemarrages": 0, "restant": None, "etape_max": 0.0, "pages": 0}
+
+    def progression(_status, restant, total):
+        maintenant = time.perf_counter()
+        etat["etape_max"] = max(etat["etape_max"], maintenant - etat["debut_etape"])
+        etat["etapes"] += 1
+        etat["pages"] = total
+        # le nombre de pages restantes remonte : la source a changé, SQLite a repris la copie
+        if etat["restant"] is not None and restant > etat["restant"]:
+            etat["redemarrages"] += 1
+            if etat["une_etape_permise"] and etat["redemarrages"] > max_redemarrages:
+                raise _TropDeRedemarrages()
+        etat["restant"] = restant
+        if pause and restant:
+            time.sleep(pause)
+        etat["debut_etape"] = time.perf_counter()
+
+    if not os.path.exists(source):
+        raise FileNotFoundError(source)
+    # mode=rw : une source disparue entre-temps n'est pas recréée vide
+    src = sqlite3.connect(f"file:{source}?mode=rw", uri=True, timeout=busy_timeout_ms / 1000)
+    dst = sqlite3.connect(partiel)
+    try:
+        rapport["journal_mode"] = src.execute("PRAGMA journal_mode").fetchone()[0].lower()
+        etat["une_etape_permise"] = rapport["journal_mode"] == "wal"
+        if checkpoint is not None:
+            occupe, journal, copiees = src.execute(f"PRAGMA wal_checkpoint({checkpoint.upper()})").fetchone()
+            rapport["checkpoint"] = {"mode": checkpoint.upper(), "occupe": bool(occupe),
+                                     "pages_wal": journal, "pages_copiees": copiees}
+
+        etat["debut_etape"] = time.perf_counter()
+        try:
+            src.backup(dst, pages=pages_par_etape, progress=progression)
+            rapport["une_etape"] = False
+        except _TropDeRedemarrages:
+            etat["debut_etape"] = time.perf_counter()
+            src.backup(dst, pages=-1, progress=progression)
+            rapport["une_etape"] = True
+
+        # copie autonome : pas de fichier -wal à transporter avec la sauvegarde
+        dst.execute("PRAGMA journal_mode=DELETE")
+        if verifier:
+            rapport["integrite"] = dst.execute("PRAGMA quick_check").fetchone()[0]
+            if rapport["integrite"] != "ok":
+                raise ValueError(f"Sauvegarde corrompue : {rapport['integrite']}")
+    except Exception:
+        dst.close()
+        if os.path.exists(partiel):
+            os.remove(partiel)
+        raise
+    finally:
+        src.close()
+    dst.close()
+
+    os.replace(partiel, destination)
+    sha = sha256_fichier(destination)
+    with open(destination + ".sha256", "w", encoding="utf-8") as f:
+        f.write(f"{sha}  {os.path.basename(destination)}\n")
+
+    duree = time.perf_counter() - debut
+    octets = os.path.getsize(destination)
+    rapport.update({
+        "pages": etat["pages"],
+        "octets": octets,
+        "etapes": etat["etapes"],
+        "redemarrages": etat["redemarrages"],
+        "etape_max_ms": round(etat["etape_max"] * 1000, 3),
+        "sha256": sha,
+        "duree_s": round(duree, 3),
+        "debit_mo_s": round(octets / 1e6 / duree, 1) if duree else None,
+    })
+    return rapport
+
+
+def restaurer(sauvegarde, destination, pages_par_etape=1024, verifier=True, busy_timeout_ms=5000):
+    """Restaure une sauvegarde dans une base, avec l'API de backup (la base peut rester ouverte ailleurs).
+
+    Pendant la copie, la base restaurée est verrouillée en écriture : les autres connexions
+    attendent la fin (jusqu'à leur busy timeout). Les classements en mémoire de ce processus
+    sont invalidés ; la génération des classements est portée au-delà de celles de la base et de
+    la sauvegarde, pour que les autres processus rechargent aussi leurs tops.
+
+    Args:
+        sauvegarde (str): Fichier produit par `sauvegarder`.
+        destination (str | RouteurSessions): Base à remplacer.
+        pages_par_etape (int, optional): Pages copiées par étape.
+        verifier (bool, optional): Si True, contrôle le fichier `.sha256` avant de restaurer.
+        busy_timeout_ms (int, optional): Attente maximale sur un verrou, en millisecondes.
+
+    Returns:
+        dict: Rapport `sauvegarde`, `destination`, `pages`, `sha256` et `duree_s`.
+
+    Raises:
+        ValueError: Si le checksum de la sauvegarde ne correspond pas.
+        FileNotFoundError: Si la sauvegarde n'existe pas, ou si `verifier` est demandé
+            sans fichier `.sha256`.
+    """
+    from components.classement import CACHE
+
+    debut = time.perf_counter()
+    sauvegarde = os.path.abspath(sauvegarde)
+    destination = _chemin(destination)
+    if not os.path.exists(sauvegarde):
+        raise FileNotFoundError(sauvegarde)
+    sha = verifier_sauvegarde(sauvegarde) if verifier else None
+
+    pages = {"total": 0}
+    src = sqlite3.connect(f"file:{sauvegarde}?mode=ro&immutable=1", uri=True)
+    dst = sqlite3.connect(destination, timeout=busy_timeout_ms / 1000)
+    try:
+        avant = _generation(dst)
+        src.backup(dst, pages=pages_par_etape,
+                   progress=lambda _status, _restant, total: pages.update(total=total))
+        _nouvelle_generation(dst, avant)
+    finally:
+        dst.close()
+        src.close()
+    CACHE.invalider(destination)
+
+    return {"sauvegarde": sauvegarde, "destination": destination, "pages": pages["total"],
+            "sha256": sha, "duree_s": round(time.perf_counter() - debut, 3)}
+
+
+def _generation(conn):
+    """Génération des classements lue avec sqlite3 (None si la table n'existe pas)."""
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'generations'").fetchone():
+        return None
+    ligne = conn.execute("SELECT valeur FROM generations WHERE nom = 'classements'").fetchone()
+    return ligne[0] if ligne else 0
+
+
+def _nouvelle_generation(conn, avant):
+    restauree = _generation(conn)
+    if restauree is None:
+        return
+    with conn:
+        conn.execute(
+            "INSERT INTO generations (nom, valeur) VALUES ('classements', ?) "
+            "ON CONFLICT (nom) DO UPDATE SET valeur = excluded.valeur",
+            (max(avant or 0, restauree) + 1,),
+        )
+
+
+def ouvrir_instantane(chemin, verifier=True, taille_pool_lecture=4):
+    """Ouvre une sauvegarde en lecture seule pour les fonctions de lecture et d'analyse.
+
+    Le fichier est ouvert avec `immutable=1` (aucun verrou) : les lectures ne touchent jamais
+    la base de production. Toute écriture lève `PermissionError`.
+
+    Returns:
+        RouteurSessions: Routeur en lecture seule, à passer à `read_command`, `chiffre_affaires`,
+            `top_produits`, `ventes_periode`...
+
+    Raises:
+        ValueError: Si le checksum de la sauvegarde ne correspond pas.
+        FileNotFoundError: Si le fichier, ou son `.sha256` quand `verifier` est demandé, n'existe pas.
+
+    Exemple:
+        instantane = ouvrir_instantane("sauvegardes/ventes.db")
+        chiffre_affaires(instantane, par="genre")
+    """
+    chemin = os.path.abspath(chemin)
+    if not os.path.exists(chemin):
+        raise FileNotFoundError(chemin)
+    if verifier:
+        verifier_sauvegarde(chemin)
+    return RouteurSessions(chemin, taille_pool_lecture=taille_pool_lecture, lecture_seule=True, immuable=True)
@@ -0,0 +1,246 @@
+# import
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from components.classement import par_lots
+from components.compact import prix_total
+from components.models import Client, Commande, Produit, Promotion, Region, promotions_regions
+from components.routeur import en_lecture
+
+
+class MoteurPrix:
+    """Moteur de tarification vectorisé : prix, remises et promotions préchargés en tableaux NumPy.
+
+    - `prix_produit[produit_id]` : prix unitaire.
+    - `remise_promotion[promotion_id]` : pourcentage d'une promotion (0 pour aucune / inconnue).
+    - promotions par (produit, région) : clés triées `produit_id * nb_regions + region_id`,
+      avec la meilleure remise et la promotion correspondante.
+    - `region_client[client_id]` : région de chaque client.
+
+    Une fois chargé, le calcul de N lignes est une seule passe NumPy, sans jointure SQL.
+
+    Exemple:
+        moteur = MoteurPrix.charger(session)
+        tarifs = moteur.tarifer_lignes(client_ids, produit_ids, quantites)
+        tarifs["prix_total"].sum()
+        moteur.tarifer_commandes_ids(session, [1, 2, 3])["prix_total"]
+    """
+
+    def __init__(self, prix_produit, remise_promotion, cles_region, remise_region, promotion_region,
+                 region_client, nb_regions):
+        self.prix_produit = prix_produit
+        self.remise_promotion = remise_promotion
+        self.cles_region = cles_region
+        self.remise_region = remise_region
+        self.promotion_region = promotion_region
+        self.region_client = region_client
+        self.nb_regions = nb_regions
+
+    @classmethod
+    def charger(cls, session: Session, produits=True, clients=True):
+        """Charge les tableaux de prix depuis la base.
+
+        Args:
+            produits (bool, optional): Charger les prix des produits (inutile si la requête les fournit déjà).
+            clients (bool, optional): Charger les régions des clients (nécessaire pour `tarifer_lignes`).
+
+        Returns:
+            MoteurPrix: Moteur prêt à tarifer.
+        """
+        prix_produit = region_client = None
+        if produits:
+            prix_produit = _tableau(session.execute(select(Produit.produit_id, Produit.prix)).all(), np.int32)
+        if clients:
+            region_client = _tableau(session.execute(select(Client.client_id, Client.region_id)).all(), np.int32, -1)
+
+        promos = session.execute(select(Promotion.promotion_id, Promotion.promotion_percent)).all()
+        remise_promotion = _tableau(promos, np.float32)
+
+        lignes = session.execute(
+            select(Promotion.produit_id, promotions_regions.c.region_id,
+                   Promotion.promotion_percent, Promotion.promotion_id)
+            .join(promotions_regions, promotions_regions.c.promotion_id == Promotion.promotion_id)
+        ).all()
+        # les clés doivent couvrir toutes les régions, pas seulement celles qui ont des promotions
+        nb_regions = max(
+            session.execute(select(func.max(Region.region_id))).scalar() or 0,
+            int(region_client.max()) if region_client is not None else 0,
+            max((r for _, r, _, _ in lignes if r is not None), default=0),
+        ) + 1
+        if lignes:
+            produit, region, percent, promo = (np.array(col) for col in zip(*lignes))
+            cles = produit.astype(np.int64) * nb_regions + region
+            # la meilleure remise par (produit, région) : tri par clé puis remise décroissante
+            ordre = np.lexsort((-percent, cles))
+            cles, percent, promo = cles[ordre], percent[ordre], promo[ordre]
+            premier = np.concatenate(([True], cles[1:] != cles[:-1]))
+            cles_region = cles[premier]
+            remise_region = percent[premier].astype(np.float32)
+            promotion_region = promo[premier].astype(np.int64)
+        else:
+            cles_region = np.empty(0, np.int64)
+            remise_region = np.empty(0, np.float32)
+            promotion_region = np.empty(0, np.int64)
+
+        return cls(prix_produit, remise_promotion, cles_region, remise_region, promotion_region,
+                   region_client, nb_regions)
+
+    def remise_commandes(self, promotion_ids):
+        """Pourcentage de remise des promotions enregistrées sur des commandes (NULL / 0 / inconnue -> 0)."""
+        ids = np.nan_to_num(np.asarray(promotion_ids, dtype=np.float64), nan=0).astype(np.int64)
+        valides = (ids > 0) & (ids < len(self.remise_promotion))
+        return np.where(valides, self.remise_promotion[np.where(valides, ids, 0)], 0).astype(np.float32)
+
+    def promotions_applicables(self, client_ids, produit_ids):
+        """Meilleure promotion (ID, remise) de chaque produit dans la région de chaque client.
+
+        Returns:
+            tuple: (promotion_ids, remises) ; promotion_id vaut 0 s'il n'y a pas de promotion.
+        """
+        if self.region_client is None:
+            raise ValueError("MoteurPrix chargé sans les clients (clients=False).")
+        client_ids = np.asarray(client_ids, dtype=np.int64)
+        produit_ids = np.asarray(produit_ids, dtype=np.int64)
+
+        if not len(self.cles_region):
+            return np.zeros(len(produit_ids), np.int64), np.zeros(len(produit_ids), np.float32)
+
+        connus = (client_ids >= 0) & (client_ids < len(self.region_client))
+        regions = np.where(connus, self.region_client[np.where(connus, client_ids, 0)], -1)
+        cles = produit_ids * self.nb_regions + regions
+
+        pos = np.minimum(np.searchsorted(self.cles_region, cles), len(self.cles_region) - 1)
+        # une région hors de [0, nb_regions) retomberait sur la clé d'un autre produit
+        trouve = (regions >= 0) & (regions < self.nb_regions) & (self.cles_region[pos] == cles)
+        promotion_ids = np.where(trouve, self.promotion_region[pos], 0)
+        remises = np.where(trouve, self.remise_region[pos], 0)
+        return promotion_ids.astype(np.int64), remises.astype(np.float32)
+
+    def tarifer_commandes(self, produit_ids, quantites, promotion_ids, prix=None, dtype=np.float64):
+        """Tarifie des commandes existantes avec la promotion enregistrée sur chacune.
+
+        Args:
+            produit_ids, quantites, promotion_ids: Tableaux de même longueur (promotion_id peut être NULL).
+            prix (array, optional): Prix unitaires déjà connus ; sinon lus dans `prix_produit`.
+            dtype (numpy.dtype, optional): Type de `prix_total`. Par défaut float64.
+
+        Returns:
+            dict: `prix_unitaire`, `promotion_percent` et `prix_total` (tableaux NumPy).
+        """
+        if prix is None:
+            prix = self._prix(produit_ids)
+        remises = self.remise_commandes(promotion_ids)
+        return _tarifs(np.asarray(prix), remises, quantites, dtype)
+
+    def tarifer_commandes_ids(self, session: Session, commande_ids, dtype=np.float64):
+        """Tarifie des commandes à partir de leurs IDs : une lecture par lots, puis une passe vectorisée.
+
+        Produit, quantité, promotion et prix unitaire sont lus en une requête par lot de `TAILLE_LOT` IDs.
+        Les IDs inconnus sont ignorés ; chaque commande apparaît une fois, dans l'ordre des IDs demandés.
+
+        Returns:
+            dict: `commande_id`, `produit_id`, `nb_produit`, `prix_unitaire`, `promotion_percent`
+                et `prix_total` (tableaux NumPy).
+        """
+        commande_ids = [int(i) for i in commande_ids]
+        lignes = []
+        for lot in par_lots(commande_ids):
+            lignes += session.execute(
+                select(Commande.commande_id, Commande.produit_id, Commande.nb_produit,
+                       Commande.promotion_id, Produit.prix)
+                .outerjoin(Produit, Produit.produit_id == Commande.produit_id)
+                .where(Commande.commande_id.in_(lot))
+            ).all()
+        rang = {commande_id: i for i, commande_id in reversed(list(enumerate(commande_ids)))}
+        lignes.sort(key=lambda ligne: rang[ligne[0]])
+
+        ids, produits, quantites, promotions, prix = (
+            (np.array(col, dtype=object) for col in zip(*lignes)) if lignes
+            else (np.empty(0, dtype=object) for _ in range(5))
+        )
+        prix = np.array([0 if p is None else p for p in prix], dtype=np.int64)
+        quantites = np.array([0 if q is None else q for q in quantites], dtype=np.int64)
+        promotions = np.array([np.nan if p is None else p for p in promotions], dtype=np.float64)
+        tarifs = self.tarifer_commandes(produits, quantites, promotions, prix=prix, dtype=dtype)
+        tarifs.update(commande_id=ids.astype(np.int64), produit_id=produits.astype(np.int64), nb_produit=quantites)
+        return tarifs
+
+    def tarifer_lignes(self, client_ids, produit_ids, quantites, dtype=np.float64):
+        """Tarifie des lignes (client, produit, quantité) avec la meilleure promotion de la région du client.
+
+        Returns:
+            dict: `prix_unitaire`, `promotion_id`, `promotion_percent` et `prix_total` (tableaux NumPy).
+        """
+        promotion_ids, remises = self.promotions_applicables(client_ids, produit_ids)
+        tarifs = _tarifs(self._prix(produit_ids), remises, quantites, dtype)
+        tarifs["promotion_id"] = promotion_ids
+        return tarifs
+
+    def _prix(self, produit_ids):
+        if self.prix_produit is None:
+            raise ValueError("MoteurPrix chargé sans les produits (produits=False).")
+        produit_ids = np.asarray(produit_ids, dtype=np.int64)
+        connus = (produit_ids >= 0) & (produit_ids < len(self.prix_produit))
+        return np.where(connus, self.prix_produit[np.where(connus, produit_ids, 0)], 0)
+
+
+def _tableau(lignes, dtype, defaut=0):
+    """Transforme des couples (id, valeur) en tableau indexé par id."""
+    if not lignes:
+        return np.full(1, defaut, dtype=dtype)
+    ids, valeurs = (np.array(col, dtype=object) for col in zip(*lignes))
+    ids = ids.astype(np.int64)
+    valeurs = np.array([defaut if v is None else v for v in valeurs], dtype=dtype)
+    tableau = np.full(ids.max() + 1, defaut, dtype=dtype)
+    tableau[ids] = valeurs
+    return tableau
+
+
+def _tarifs(prix, remises, quantites, dtype):
+    return {"prix_unitaire": prix, "promotion_percent": remises,
+            "prix_total": prix_total(quantites, prix, remises, dtype=dtype)}
+
+
+@en_lecture
+def chiffre_affaires(session: Session, par="region", filter_exp=None):
+    """Chiffre d'affaires et unités vendues, agrégés en une passe vectorisée.
+
+    Args:
+        par (str, optional): "region", "genre", "platform", "produit" ou "client".
+        filter_exp (expression SQLAlchemy, optional): Filtre sur les commandes.
+
+    Returns:
+        pandas.DataFrame: Colonnes `unites`, `chiffre_affaires`, indexé par la dimension choisie.
+
+    Raises:
+        ValueError: Si la dimension est inconnue.
+    """
+    import pandas as pd
+
+    colonnes = {
+        "region": Client.region_id,
+        "genre": Produit.genre_cod,
+        "platform": Produit.platform_cod,
+        "produit": Commande.produit_id,
+        "client": Commande.client_id,
+    }
+    if par not in colonnes:
+        raise ValueError(f"Dimension inconnue : {par} (attendu : {', '.join(colonnes)})")
+
+    query = (
+        select(colonnes[par].label(par), Commande.produit_id, Commande.nb_produit,
+               Commande.promotion_id, Produit.prix)
+        .join(Produit, Produit.produit_id == Commande.produit_id)
+        .join(Client, Client.client_id == Commande.client_id)
+    )
+    if filter_exp is not None:
+        query = query.where(filter_exp)
+
+    df = pd.read_sql(query, session.connection())
+    moteur = MoteurPrix.charger(session, produits=False, clients=False)
+    tarifs = moteur.tarifer_commandes(df["produit_id"], df["nb_produit"], df["promotion_id"], prix=df["prix"])
+    df["chiffre_affaires"] = tarifs["prix_total"]
+    return (df.rename(columns={"nb_produit": "unites"})
+              .groupby(par)[["unites", "chiffre_affaires"]].sum()
+              .sort_values("chiffre_affaires", ascending=False))
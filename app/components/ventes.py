@@ -0,0 +1,192 @@
+# import
+import calendar
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import and_, delete, func, literal, or_, select, union_all
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from components.classement import lignes_commandes, revenu_ligne
+from components.models import Client, Commande, Produit, Promotion, VenteJour, VenteMois
+from components.routeur import en_lecture, en_ecriture
+
+
+# Regroupements possibles pour `ventes_periode`
+REGROUPEMENTS = ("region", "produit", "promotion")
+
+
+def maintenant():
+    """Horodatage d'une commande : UTC sans fuseau, comme CURRENT_TIMESTAMP de SQLite."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def appliquer_ventes(session: Session, commande_ids, signe=1, lignes=None):
+    """Répercute des commandes dans les agrégats `ventes_jours` et `ventes_mois`.
+
+    Même contrat que `appliquer_commandes` : dans la transaction d'écriture, après une insertion
+    ou avant une suppression. Les commandes sans date (antérieures à `date_commande`) sont ignorées.
+
+    Args:
+        commande_ids (list[int]): IDs des commandes concernées.
+        signe (int, optional): 1 pour ajouter, -1 pour retirer.
+        lignes (list, optional): Résultat de `lignes_commandes`, s'il est déjà lu.
+    """
+    if lignes is None:
+        lignes = lignes_commandes(session, commande_ids)
+
+    jours, mois = {}, {}
+    for ligne in lignes:
+        if ligne.date_commande is None or ligne.region is None:
+            continue
+        jour = ligne.date_commande.strftime("%Y-%m-%d")
+        for agregat, periode in ((jours, jour), (mois, jour[:7])):
+            cle = (periode, ligne.produit_id, ligne.region, ligne.promotion_id or 0)
+            unites, revenu = agregat.get(cle, (0, 0.0))
+            agregat[cle] = (unites + signe * (ligne.nb_produit or 0), revenu + signe * (ligne.revenu or 0))
+
+    _ajouter(session, VenteJour, "jour", jours)
+    _ajouter(session, VenteMois, "mois", mois)
+
+
+def _ajouter(session, table, colonne_periode, deltas):
+    if not deltas:
+        return
+    stmt = insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[getattr(table, colonne_periode), table.produit_id, table.region_id, table.promotion_id],
+        set_={"unites": table.unites + stmt.excluded.unites, "revenu": table.revenu + stmt.excluded.revenu},
+    )
+    session.execute(stmt, [
+        {colonne_periode: periode, "produit_id": p, "region_id": r, "promotion_id": promo,
+         "unites": u, "revenu": rev}
+        for (periode, p, r, promo), (u, rev) in deltas.items()
+    ])
+
+
+def _fin_de_mois(jour):
+    return jour.replace(day=calendar.monthrange(jour.year, jour.month)[1])
+
+
+@en_ecriture
+def reconstruire_ventes(session: Session, debut=None, fin=None):
+    """Recalcule les agrégats de ventes à partir de `commandes`, sur toute la base ou une période.
+
+    La période est étendue aux mois entiers pour que les agrégats mensuels restent exacts.
+
+    Args:
+        debut (date, optional): Premier jour à recalculer. Par défaut, depuis le début.
+        fin (date, optional): Dernier jour à recalculer (inclus). Par défaut, jusqu'à la fin.
+
+    Returns:
+        int: Nombre de lignes d'agrégats journaliers écrites.
+    """
+    debut = debut.replace(day=1) if debut else None
+    fin = _fin_de_mois(fin) if fin else None
+
+    filtres = [Commande.date_commande.is_not(None), Client.region_id.is_not(None)]
+    if debut:
+        filtres.append(Commande.date_commande >= datetime.combine(debut, datetime.min.time()))
+    if fin:
+        filtres.append(Commande.date_commande < datetime.combine(fin + timedelta(days=1), datetime.min.time()))
+
+    total = 0
+    for table, colonne, format in ((VenteJour, "jour", "%Y-%m-%d"), (VenteMois, "mois", "%Y-%m")):
+        periode_col = getattr(table, colonne)
+        suppression = delete(table)
+        if debut:
+            suppression = suppression.where(periode_col >= debut.strftime(format))
+        if fin:
+            suppression = suppression.where(periode_col <= fin.strftime(format))
+        session.execute(suppression)
+
+        periode = func.strftime(format, Commande.date_commande)
+        promotion = func.coalesce(Commande.promotion_id, 0)
+        agregat = (
+            select(periode, Commande.produit_id, Client.region_id, promotion,
+                   func.sum(Commande.nb_produit), func.sum(revenu_ligne()))
+            .join(Produit, Produit.produit_id == Commande.produit_id)
+            .join(Client, Client.client_id == Commande.client_id)
+            .outerjoin(Promotion, Promotion.promotion_id == Commande.promotion_id)
+            .where(*filtres)
+            .group_by(periode, Commande.produit_id, Client.region_id, promotion)
+        )
+        res = session.execute(insert(table).from_select(
+            [colonne, "produit_id", "region_id", "promotion_id", "unites", "revenu"], agregat
+        ))
+        if table is VenteJour:
+            total = res.rowcount
+    session.commit()
+    return total
+
+
+def _decouper(debut, fin):
+    """Découpe [debut, fin] en mois entiers et en plages de jours (début et fin de période)."""
+    mois, plages = [], []
+    courant = debut
+    while courant <= fin:
+        fin_mois = _fin_de_mois(courant)
+        borne = min(fin, fin_mois)
+        if courant.day == 1 and borne == fin_mois:
+            mois.append(courant.strftime("%Y-%m"))
+        else:
+            plages.append((courant.strftime("%Y-%m-%d"), borne.strftime("%Y-%m-%d")))
+        courant = fin_mois + timedelta(days=1)
+    return mois, plages
+
+
+@en_lecture
+def ventes_periode(session: Session, debut, fin, par="region"):
+    """Unités et chiffre d'affaires sur une période, lus uniquement dans les agrégats.
+
+    Les mois entiers sont lus dans `ventes_mois`, les jours restants dans `ventes_jours` :
+    le coût dépend du nombre de buckets couverts, pas du nombre de commandes.
+
+    Args:
+        debut (date): Premier jour (inclus).
+        fin (date): Dernier jour (inclus).
+        par (str, optional): "region", "produit", "promotion" ou None pour un total.
+
+    Returns:
+        pandas.DataFrame: Colonnes `unites` et `revenu`, indexé par le regroupement choisi.
+
+    Raises:
+        ValueError: Si le regroupement est inconnu.
+
+    Exemple:
+        ventes_periode(session, *derniers_jours(7), par="region")
+    """
+    import pandas as pd
+
+    if par is not None and par not in REGROUPEMENTS:
+        raise ValueError(f"Regroupement inconnu : {par} (attendu : {', '.join(REGROUPEMENTS)} ou None)")
+    mois, plages = _decouper(debut, fin)
+
+    def _partie(table, condition):
+        cle = getattr(table, f"{par}_id").label(par) if par else literal("total").label("periode")
+        return select(cle, table.unites, table.revenu).where(condition)
+
+    parties = []
+    if mois:
+        parties.append(_partie(VenteMois, VenteMois.mois.in_(mois)))
+    if plages:
+        parties.append(_partie(VenteJour, or_(*[and_(VenteJour.jour >= a, VenteJour.jour <= b) for a, b in plages])))
+    if not parties:
+        return pd.DataFrame(columns=["unites", "revenu"])
+
+    source = union_all(*parties).subquery()
+    cle = source.c[par] if par else source.c.periode
+    query = (select(cle, func.sum(source.c.unites).label("unites"), func.sum(source.c.revenu).label("revenu"))
+             .group_by(cle)
+             .order_by(func.sum(source.c.revenu).desc()))
+    return pd.read_sql(query, session.connection(), index_col=par or "periode")
+
+
+def derniers_jours(n, aujourd_hui=None):
+    """Retourne (debut, fin) couvrant les `n` derniers jours, aujourd'hui inclus (UTC)."""
+    fin = aujourd_hui or maintenant().date()
+    return fin - timedelta(days=n - 1), fin
+
+
+def lire_date(valeur):
+    """Convertit "AAAA-MM-JJ" (ou une date) en `date`."""
+    return valeur if isinstance(valeur, date) else date.fromisoformat(valeur)
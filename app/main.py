@@ -1,14 +1,39 @@
 # import
 
-from IPython.display import clear_output
+import argparse
 import json
 import os
+import sys
 
-from sqlalchemy import  create_engine
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.sql import func
-from components.models import *           
-from components.crud import *             
+# Les modules lourds (IPython, pandas, SQLAlchemy, components.*) sont importés
+# à l'intérieur des fonctions qui en ont besoin : une invocation en ligne de
+# commande ne charge que ce que la sous-commande utilise.
+
+DB_PATH = os.path.join(os.path.dirname(__file__), "BD_Ventes_de_jeux_video.db")
+CSV_PATH = os.path.join(os.path.dirname(__file__), "data", "vgsales.csv")
+
+
+def get_tables():
+    """Retourne le dictionnaire nom de table -> classe SQLAlchemy utilisé par les menus et la CLI."""
+    from components.models import Commande, Client, Promotion, DonnePersonnel, Produit, Log
+
+    return {
+        "Commande": Commande,
+        "Client": Client,
+        "Promotion": Promotion,
+        "DonnePersonnel": DonnePersonnel,
+        "Produit": Produit,
+        "Log": Log,
+    }
+
+
+def eval_filtre(expression):
+    """Évalue une expression de filtre SQLAlchemy (ex: "Client.age_id == 1") avec les modèles en portée."""
+    if not expression:
+        return None
+    import components.models as models
+
+    return eval(expression, vars(models))
 
 
 def menu_admin(session):
@@ -18,16 +43,13 @@ def menu_admin(session):
     La fonction utilise match/case pour gérer les choix de manière claire et structurée. 
     Elle inclut également une gestion d’erreurs afin d’éviter l’arrêt du programme en cas de saisie incorrecte ou d’exception.
     """
+    from IPython.display import clear_output
+    from components.crud import update_table, add_log
+
     try:
         while True:
-            tables = {
-                        "Commande": Commande,
-                        "Client": Client,
-                        "Promotion": Promotion,
-                        "DonnePersonnel": DonnePersonnel,
-                        "Produit": Produit
-                    } 
-            
+            tables = get_tables()
+
 
             clear_output(wait=True)
             print("\n--- Menu ---")
@@ -75,6 +97,9 @@ def menu_admin(session):
         print(f"Erreur : {e}")
 
 def creation_menu(session):
+    from IPython.display import clear_output
+    from components.crud import create_donne_personnel, create_client, create_commande, create_promotion, add_log
+
     try:
         while True:
             clear_output(wait=True)
@@ -137,6 +162,9 @@ def creation_menu(session):
 # R - READ
 
 def read_menu(session):
+    from IPython.display import clear_output
+    from components.crud import read_promo, read_produit, read_command, read_client
+
     try:
         while True:
             clear_output(wait=True)
@@ -161,7 +189,7 @@ def read_menu(session):
             # --- Filter (placeholder simple) ---
             # Здесь можно вводить SQLAlchemy-выражения, но для простоты используем None
             filter = input("Filter expression (laisser vide pour aucun) : ").strip()
-            filter_exp = eval(filter) if filter else None
+            filter_exp = eval_filtre(filter)
 
             match action:
                 case "a":
@@ -188,16 +216,11 @@ def read_menu(session):
 
 def delete_menu(session):
     from IPython.display import clear_output  # если используешь Jupyter
+    from components.crud import delete_objet, delete_filtre, add_log
 
     try:
         while True:
-            tables = {
-                "Commande": Commande,
-                "Client": Client,
-                "Promotion": Promotion,
-                "DonnePersonnel": DonnePersonnel,
-                "Produit": Produit
-            } 
+            tables = get_tables()
             clear_output(wait=True)
             print("\n---DELETE Menu ---")
             print("Fonctions possibles :")
@@ -221,7 +244,7 @@ def delete_menu(session):
                 case "b":
                     table_nom = input("Nom de la table : ").strip()
                     table_class = tables.get(table_nom)
-                    filter_exp = eval(input("Filtre SQLAlchemy (ex: Table.col == valeur) : ").strip())
+                    filter_exp = eval_filtre(input("Filtre SQLAlchemy (ex: Table.col == valeur) : ").strip())
 
                     delete_filtre(session, table_class, filter_exp)
                     add_log(session, "delete", table_nom, details=f"condution: {filter_exp}")
@@ -232,18 +255,387 @@ def delete_menu(session):
         print(f"Erreur : {e}")
 
 
-def main():
-    db_path = os.path.join(os.path.dirname(__file__), "BD_Ventes_de_jeux_video.db")
-    engine = create_engine(f"sqlite:///{db_path}")
+# CLI (mode non interactif)
+
+LECTURES = {
+    "promo": "read_promo",
+    "produit": "read_produit",
+    "commande": "read_command",
+    "client": "read_client",
+}
 
-    # Création de la session
-    Session = sessionmaker(bind=engine)
-    session = Session()
+# Sous-commandes de lecture : elles ne migrent jamais la base (voir `RouteurSessions.migrer`)
+COMMANDES_LECTURE = ("read", "export", "chiffre", "ventes", "classement")
+
+
+def executer_operation(session, op, commit=True):
+    """
+    Exécute une opération d'écriture décrite par un dictionnaire et la journalise.
+
+    Args:
+        session: Session SQLAlchemy.
+        op (dict): Opération, par exemple :
+            {"op": "create", "table": "Commande", "data": {"client_id": 1, "produit_id": 2, "nb_produit": 3}}
+            {"op": "update", "table": "Client", "id": 51, "data": {"age_id": 1}}
+            {"op": "delete", "table": "Client", "id": 51}
+            {"op": "delete", "table": "Client", "filter": "Client.age_id == 1"}
+            {"op": "import", "table": "Commande", "rows": [{...}, {...}]}
+        commit (bool, optional): Si False, les fonctions CRUD font un simple flush (mode batch).
+
+    Raises:
+        ValueError: Si l'opération ou la table est inconnue.
+        Exception: Toute erreur d'une fonction CRUD (suppressions comprises) est propagée :
+            en mode batch, `routeur.ecriture()` annule alors le lot entier.
+    """
+    from components import crud
+
+    action = op.get("op")
+    table_nom = op.get("table")
+    table_class = get_tables().get(table_nom)
+    if table_class is None:
+        raise ValueError(f"Table inconnue : {table_nom}")
+    data = op.get("data") or {}
+
+    match action:
+        case "create":
+            creations = {
+                "Client": crud.create_client,
+                "DonnePersonnel": crud.create_donne_personnel,
+                "Commande": crud.create_commande,
+                "Promotion": crud.create_promotion,
+            }
+            if table_nom not in creations:
+                raise ValueError(f"Création non supportée pour {table_nom}")
+            creations[table_nom](session, **data, commit=commit)
+            crud.add_log(session, "create", table_nom, client_id=data.get("client_id"), commit=commit)
+        case "update":
+            crud.update_table(session, table_class, int(op["id"]), commit=commit, **data)
+            crud.add_log(session, "update", table_nom, details=f"data_id: {op['id']}", commit=commit)
+        case "delete":
+            if "filter" in op:
+                crud.delete_filtre(session, table_class, eval_filtre(op["filter"]), commit=commit)
+                crud.add_log(session, "delete", table_nom, details=f"condution: {op['filter']}", commit=commit)
+            else:
+                crud.delete_objet(session, table_class, int(op["id"]), commit=commit)
+                crud.add_log(session, "delete", table_nom, details=f"obj_id: {op['id']}", commit=commit)
+        case "import":
+            n = crud.create_lignes(session, table_class, op.get("rows") or [], commit=commit)
+            crud.add_log(session, "import", table_nom, details=f"lignes: {n}", commit=commit)
+        case _:
+            raise ValueError(f"Opération inconnue : {action}")
+
+
+def lire_lignes(path):
+    """Lit un fichier CSV ou JSON-lines et retourne une liste de dictionnaires (pandas uniquement pour le CSV)."""
+    if path.endswith(".csv"):
+        import pandas as pd
+
+        df = pd.read_csv(path)
+        return df.astype(object).where(df.notna(), None).to_dict(orient="records")
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(ligne) for ligne in f if ligne.strip()]
+
+
+def lire_dataframe(session, cible, limit=None, filter_exp=None, compact=False):
+    """Retourne le DataFrame d'une lecture CLI : une vue métier (promo, produit, ...) ou une table."""
+    from components import crud
+
+    if cible in LECTURES:
+        res = getattr(crud, LECTURES[cible])(session, limit=limit, filter_exp=filter_exp, compact=compact)
+        return res[0] if cible == "promo" else res
+    table_class = get_tables().get(cible)
+    if table_class is None:
+        raise ValueError(f"Lecture inconnue : {cible}")
+    return crud.read_table(session, table_class, limit=limit, filter_exp=filter_exp, compact=compact)
+
+
+def ecrire_dataframe(df, path=None, format="csv"):
+    """Écrit un DataFrame en CSV ou JSON-lines, vers un fichier ou la sortie standard."""
+    sortie = path or sys.stdout
+    if format == "json":
+        df.to_json(sortie, orient="records", lines=True, force_ascii=False, date_format="iso")
+    else:
+        df.to_csv(sortie, index=df.index.name is not None)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Administration de la base de ventes de jeux vidéo. Sans sous-commande : menu interactif."
+    )
+    parser.add_argument("--db", default=DB_PATH, help="Chemin de la base SQLite")
+    parser.add_argument("--instantane", action="store_true",
+                        help="Ouvrir --db en lecture seule, comme instantané (ex.: une sauvegarde)")
+    sub = parser.add_subparsers(dest="commande")
+
+    p = sub.add_parser("create", help="Créer un enregistrement")
+    p.add_argument("table")
+    p.add_argument("data", help='Valeurs en JSON, ex: {"client_id": 1, "produit_id": 2, "nb_produit": 3}')
+
+    p = sub.add_parser("read", help="Lire une vue (promo, produit, commande, client) ou une table")
+    p.add_argument("cible")
+    p.add_argument("--limit", type=int)
+    p.add_argument("--filter", help='Expression SQLAlchemy, ex: "Client.region_id == 1"')
+    p.add_argument("--format", choices=["csv", "json"], default="csv")
+    p.add_argument("--compact", action="store_true")
+
+    p = sub.add_parser("update", help="Mettre à jour un enregistrement")
+    p.add_argument("table")
+    p.add_argument("id", type=int)
+    p.add_argument("data", help='Colonnes en JSON, ex: {"age_id": 1}')
+
+    p = sub.add_parser("delete", help="Supprimer par ID ou par filtre")
+    p.add_argument("table")
+    p.add_argument("id", type=int, nargs="?")
+    p.add_argument("--filter")
+
+    p = sub.add_parser("import", help="Insérer en masse les lignes d'un fichier CSV ou JSON-lines")
+    p.add_argument("table")
+    p.add_argument("path")
+
+    p = sub.add_parser("export", help="Exporter une vue ou une table en CSV ou JSON-lines")
+    p.add_argument("cible")
+    p.add_argument("path")
+    p.add_argument("--limit", type=int)
+    p.add_argument("--filter")
+    p.add_argument("--format", choices=["csv", "json"])
+
+    p = sub.add_parser("classement", help="Meilleures ventes par région, genre ou plateforme")
+    p.add_argument("dimension", choices=["region", "genre", "platform", "rebuild"],
+                   help="Dimension du classement, ou 'rebuild' pour tout recalculer")
+    p.add_argument("dimension_id", type=int, nargs="?")
+    p.add_argument("--n", type=int, default=20)
+    p.add_argument("--par", choices=["unites", "revenu"], default="unites")
+
+    p = sub.add_parser("chiffre", help="Chiffre d'affaires par région, genre, plateforme, produit ou client")
+    p.add_argument("--par", choices=["region", "genre", "platform", "produit", "client"], default="region")
+    p.add_argument("--filter")
+    p.add_argument("--format", choices=["csv", "json"], default="csv")
+
+    p = sub.add_parser("ventes", help="Ventes agrégées par jour / mois sur une période")
+    p.add_argument("--jours", type=int, default=7, help="Les N derniers jours (si --depuis est absent)")
+    p.add_argument("--depuis", help="Premier jour, AAAA-MM-JJ")
+    p.add_argument("--jusqu", help="Dernier jour inclus, AAAA-MM-JJ (par défaut aujourd'hui)")
+    p.add_argument("--par", choices=["region", "produit", "promotion", "total"], default="region")
+    p.add_argument("--rebuild", action="store_true", help="Recalculer les agrégats de la période (ou de toute la base)")
+    p.add_argument("--format", choices=["csv", "json"], default="csv")
+
+    p = sub.add_parser("catalogue", help="Import incrémental d'un vgsales.csv mis à jour")
+    p.add_argument("path")
+    p.add_argument("--reference", default=CSV_PATH,
+                   help="CSV d'origine de la base (amorçage des empreintes au premier import)")
+    p.add_argument("--dry-run", action="store_true", help="Afficher le rapport sans rien écrire")
+
+    p = sub.add_parser("backup", help="Sauvegarde à chaud de la base, par étapes, avec checksum")
+    p.add_argument("path", help="Fichier de sauvegarde")
+    p.add_argument("--pages", type=int, default=1024, help="Pages copiées par étape")
+    p.add_argument("--pause", type=float, default=0.0, help="Pause entre deux étapes, en secondes")
+    p.add_argument("--checkpoint", type=str.upper, choices=["PASSIVE", "FULL", "RESTART", "TRUNCATE"],
+                   help="Checkpoint WAL avant la copie")
+    p.add_argument("--verifier", action="store_true", help="Contrôle d'intégrité de la copie (quick_check)")
+
+    p = sub.add_parser("restore", help="Restaurer une sauvegarde dans --db")
+    p.add_argument("path", help="Fichier de sauvegarde")
+    p.add_argument("--sans-verification", action="store_true", help="Ne pas contrôler le checksum")
+
+    p = sub.add_parser("charge", help="Test de charge multi-threads / multi-processus sur une base de test")
+    p.add_argument("--base", help="Base de test à créer depuis --csv (par défaut : fichier temporaire)")
+    p.add_argument("--reutiliser", action="store_true", help="Réutiliser --base sans la recréer")
+    p.add_argument("--csv", default=CSV_PATH)
+    p.add_argument("--threads", type=int, default=4, help="Threads par processus")
+    p.add_argument("--processus", type=int, default=1)
+    p.add_argument("--duree", type=float, default=10.0, help="Durée en secondes")
+    p.add_argument("--melange", help='Poids, ex: "create_commande=0.5,add_log=0.3,read_table=0.1,update_table=0.1"')
+    p.add_argument("--mode", choices=["routeur", "session"], default="routeur")
+    p.add_argument("--max-essais", type=int, default=5, help="Tentatives par opération sur 'database is locked'")
+    p.add_argument("--busy-timeout", type=int, default=5000, help="Busy timeout SQLite, en millisecondes")
+    p.add_argument("--part-promotions", type=float, default=0.2,
+                   help="Part des commandes passées sur un produit en promotion (amorçage et charge)")
+    p.add_argument("--graine", type=int, default=0)
+    p.add_argument("--sortie", help="Enregistrer le rapport JSON dans ce fichier")
+    p.add_argument("--comparer", help="Rapport JSON de référence : afficher les écarts")
+
+    p = sub.add_parser("batch", help="Exécuter un fichier JSON-lines d'opérations dans une seule transaction")
+    p.add_argument("path")
+
+    sub.add_parser("migrer", help="Mettre à jour le schéma de --db (une fois, avant les lectures)")
+
+    return parser
+
+
+def ouvrir_routeur(args):
+    """Routeur sur --db, ou instantané en lecture seule avec --instantane."""
+    if args.instantane:
+        from components.sauvegarde import ouvrir_instantane
+
+        return ouvrir_instantane(args.db)
+    from components.routeur import RouteurSessions
+
+    return RouteurSessions(args.db)
+
+
+def run_cli(args):
+    """Exécute une sous-commande : les écritures dans une seule session et un seul commit,
+    les lectures sur le pool de lecture."""
+    match args.commande:
+        case "backup":
+            from components.sauvegarde import sauvegarder
+
+            rapport = sauvegarder(args.db, args.path, pages_par_etape=args.pages, pause=args.pause,
+                                  checkpoint=args.checkpoint, verifier=args.verifier)
+            print(json.dumps(rapport, ensure_ascii=False, indent=2))
+            return
+        case "restore":
+            from components.sauvegarde import restaurer
+
+            rapport = restaurer(args.path, args.db, verifier=not args.sans_verification)
+            print(json.dumps(rapport, ensure_ascii=False, indent=2))
+            return
+        case "charge":
+            charge_cli(args)
+            return
+
+    routeur = ouvrir_routeur(args)
+
+    try:
+        if args.commande in COMMANDES_LECTURE and not routeur.lecture_seule and not routeur.schema_a_jour():
+            raise RuntimeError(f"Schéma de {args.db} à mettre à jour : lancer `python main.py --db {args.db} "
+                               "migrer` (une lecture n'écrit jamais dans la base).")
+        match args.commande:
+            case "migrer":
+                nouvelles = routeur.migrer()
+                print(f"Schéma à jour ({len(nouvelles)} tables créées).")
+            case "read":
+                df = lire_dataframe(routeur, args.cible, args.limit, eval_filtre(args.filter), args.compact)
+                ecrire_dataframe(df, format=args.format)
+            case "export":
+                format = args.format or ("json" if args.path.endswith((".json", ".jsonl")) else "csv")
+                df = lire_dataframe(routeur, args.cible, args.limit, eval_filtre(args.filter))
+                ecrire_dataframe(df, args.path, format)
+            case "chiffre":
+                from components.tarification import chiffre_affaires
+
+                df = chiffre_affaires(routeur, par=args.par, filter_exp=eval_filtre(args.filter))
+                ecrire_dataframe(df, format=args.format)
+            case "ventes":
+                from components.ventes import derniers_jours, lire_date, reconstruire_ventes, ventes_periode
+
+                if args.rebuild:
+                    debut = lire_date(args.depuis) if args.depuis else None
+                    fin = lire_date(args.jusqu) if args.jusqu else None
+                    print(f"{reconstruire_ventes(routeur, debut, fin)} agrégats journaliers recalculés.")
+                else:
+                    if args.depuis:
+                        debut = lire_date(args.depuis)
+                        fin = lire_date(args.jusqu) if args.jusqu else derniers_jours(1)[1]
+                    else:
+                        debut, fin = derniers_jours(args.jours)
+                    par = None if args.par == "total" else args.par
+                    ecrire_dataframe(ventes_periode(routeur, debut, fin, par=par), format=args.format)
+            case "catalogue":
+                from components.catalogue import importer_catalogue
+
+                rapport = importer_catalogue(routeur, args.path, reference=args.reference, dry_run=args.dry_run)
+                print(json.dumps(rapport, ensure_ascii=False, indent=2))
+            case "classement":
+                from components.classement import reconstruire_classements, top_produits
+
+                if args.dimension == "rebuild":
+                    print(f"{reconstruire_classements(routeur)} lignes de classement recalculées.")
+                else:
+                    if args.dimension_id is None:
+                        raise ValueError("classement : préciser l'ID de la dimension")
+                    for rang, (produit_id, valeur) in enumerate(
+                            top_produits(routeur, args.dimension, args.dimension_id, args.n, args.par), 1):
+                        print(f"{rang}\t{produit_id}\t{valeur}")
+            case _:
+                operations = operations_cli(args)
+                with routeur.ecriture() as session:
+                    for op in operations:
+                        executer_operation(session, op, commit=False)
+                if args.commande == "batch":
+                    print(f"{len(operations)} opérations validées.")
+    finally:
+        routeur.dispose()
+
+
+def charge_cli(args):
+    """Prépare la base de test, lance le test de charge et affiche le rapport (et l'écart à une référence).
+
+    Sans `--base`, la base est créée dans un dossier temporaire supprimé à la fin (avec -wal / -shm).
+    """
+    import shutil
+    import tempfile
+    from components.charge import comparer_rapports, lancer_charge, lire_melange, lire_rapport, preparer_base
+
+    if args.reutiliser and not args.base:
+        raise SystemExit("--reutiliser demande --base")
+    dossier = None if args.base else tempfile.mkdtemp(prefix="charge_")
+    base = args.base or os.path.join(dossier, "charge.db")
+    try:
+        if not args.reutiliser:
+            preparer_base(base, args.csv, part_promotions=args.part_promotions, graine=args.graine)
+        rapport = lancer_charge(
+            base, threads=args.threads, processus=args.processus, duree=args.duree,
+            melange=lire_melange(args.melange) if args.melange else None, mode=args.mode,
+            max_essais=args.max_essais, busy_timeout_ms=args.busy_timeout,
+            part_promotions=args.part_promotions, graine=args.graine,
+        )
+    finally:
+        if dossier is not None:
+            shutil.rmtree(dossier, ignore_errors=True)
+    texte = json.dumps(rapport, ensure_ascii=False, indent=2)
+    if args.sortie:
+        with open(args.sortie, "w", encoding="utf-8") as f:
+            f.write(texte + "\n")
+    else:
+        print(texte)
+    if args.comparer:
+        print(comparer_rapports(lire_rapport(args.comparer), rapport).to_string())
+
+
+def operations_cli(args):
+    """Traduit une sous-commande d'écriture en liste d'opérations pour `executer_operation`."""
+    match args.commande:
+        case "create":
+            return [{"op": "create", "table": args.table, "data": json.loads(args.data)}]
+        case "update":
+            return [{"op": "update", "table": args.table, "id": args.id, "data": json.loads(args.data)}]
+        case "delete":
+            op = {"op": "delete", "table": args.table}
+            if args.filter:
+                op["filter"] = args.filter
+            elif args.id is not None:
+                op["id"] = args.id
+            else:
+                raise ValueError("delete : préciser un ID ou --filter")
+            return [op]
+        case "import":
+            return [{"op": "import", "table": args.table, "rows": lire_lignes(args.path)}]
+        case "batch":
+            with open(args.path, encoding="utf-8") as f:
+                return [json.loads(ligne) for ligne in f if ligne.strip()]
+    raise ValueError(f"Commande inconnue : {args.commande}")
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.commande:
+        try:
+            run_cli(args)
+        except Exception as e:
+            print(f"Erreur : {e}", file=sys.stderr)
+            return 1
+        return 0
+
+    # Création du routeur : une session courte par opération (écriture ou lecture)
+    routeur = ouvrir_routeur(args)
 
     try:
-        menu_admin(session)  # on passe la session à l'admin menu
+        if not routeur.lecture_seule:
+            routeur.migrer()
+        menu_admin(routeur)  # on passe le routeur à l'admin menu
     finally:
-        session.close()  # fermeture propre de la session
+        routeur.dispose()  # fermeture propre des connexions
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,54 @@
+# import
+import os
+import shutil
+import sqlite3
+import sys
+
+import pytest
+
+APP = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP)
+
+DB_PATH = os.path.join(APP, "BD_Ventes_de_jeux_video.db")
+
+
+@pytest.fixture
+def routeur(tmp_path):
+    """Routeur sur une copie migrée de la base fournie (la base du dépôt n'est jamais modifiée)."""
+    from components.routeur import RouteurSessions
+
+    chemin = tmp_path / "ventes.db"
+    shutil.copy(DB_PATH, chemin)
+    routeur = RouteurSessions(str(chemin))
+    routeur.migrer()
+    yield routeur
+    routeur.dispose()
+
+
+TABLES = ("classements", "ventes_jours", "ventes_mois")
+
+
+def _contenu(routeur):
+    """Lignes non nulles des tables incrémentales, triées (les clés sont toutes les colonnes sauf les deux dernières)."""
+    with sqlite3.connect(routeur.db_path) as conn:
+        contenu = {}
+        for table in TABLES:
+            lignes = conn.execute(f"SELECT * FROM {table}").fetchall()
+            contenu[table] = sorted(l for l in lignes if l[-2] or abs(l[-1]) > 1e-6)
+    return contenu
+
+
+def verifier_contre_reconstruction(routeur):
+    """Compare les tables incrémentales à une reconstruction complète (puis les laisse reconstruites)."""
+    from components.classement import reconstruire_classements
+    from components.ventes import reconstruire_ventes
+
+    incremental = _contenu(routeur)
+    reconstruire_classements(routeur)
+    reconstruire_ventes(routeur)
+    reconstruit = _contenu(routeur)
+    for table in TABLES:
+        assert len(incremental[table]) == len(reconstruit[table]), table
+        for a, b in zip(incremental[table], reconstruit[table]):
+            assert a[:-1] == b[:-1], table
+            assert a[-1] == pytest.approx(b[-1]), table
@@ -0,0 +1,52 @@
+# import
+import sqlite3
+
+import pandas as pd
+
+from components.catalogue import importer_catalogue
+from conftest import APP, verifier_contre_reconstruction
+
+CSV_PATH = f"{APP}/data/vgsales.csv"
+
+
+def _csv_modifie(tmp_path, modifier):
+    df = pd.read_csv(CSV_PATH)
+    modifier(df)
+    chemin = tmp_path / "vgsales.csv"
+    df.to_csv(chemin, index=False)
+    return str(chemin)
+
+
+def test_codes_dans_la_numerotation_existante(routeur, tmp_path):
+    """Produits modifiés et nouveaux produits reçoivent les codes du notebook (code de la table - 1)."""
+    def modifier(df):
+        df.loc[0, "Genre"] = "Action"
+        df.loc[len(df)] = ["999999", "Nouveau jeu", "Wii", 2006, "Sports", "Nintendo", 0, 0, 0, 0, 0]
+
+    importer_catalogue(routeur, _csv_modifie(tmp_path, modifier), reference=CSV_PATH)
+
+    with sqlite3.connect(routeur.db_path) as conn:
+        requete = """
+            SELECT g.genre_nom, pl.platform_nom, y.year_nom, pu.publisher_nom
+            FROM produits p
+            JOIN genres g ON g.genre_cod = p.genre_cod + 1
+            JOIN platforms pl ON pl.platform_cod = p.platform_cod + 1
+            JOIN years y ON y.year_cod = p.year_n + 1
+            JOIN publishers pu ON pu.publisher_cod = p.publisher_cod + 1
+            WHERE p.name = ?
+        """
+        assert conn.execute(requete, ("Wii Sports",)).fetchone() == ("Action", "Wii", "2006.0", "Nintendo")
+        assert conn.execute(requete, ("Nouveau jeu",)).fetchone() == ("Sports", "Wii", "2006.0", "Nintendo")
+
+
+def test_changement_de_genre_dans_les_classements(routeur, tmp_path):
+    """Les totaux d'un produit qui change de genre passent dans le classement du nouveau genre."""
+    from components.crud import create_commande
+
+    create_commande(routeur, 1, 1, 4)
+
+    def modifier(df):
+        df.loc[0, "Genre"] = "Action"
+
+    importer_catalogue(routeur, _csv_modifie(tmp_path, modifier), reference=CSV_PATH)
+    verifier_contre_reconstruction(routeur)
@@ -0,0 +1,77 @@
+# import
+import json
+import shutil
+import sqlite3
+
+import pytest
+
+from conftest import DB_PATH
+import main
+
+
+@pytest.fixture
+def base(tmp_path):
+    """Copie migrée de la base fournie, passée à la CLI avec --db."""
+    chemin = tmp_path / "ventes.db"
+    shutil.copy(DB_PATH, chemin)
+    assert main.main(["--db", str(chemin), "migrer"]) == 0
+    return str(chemin)
+
+
+def _compter(base):
+    with sqlite3.connect(base) as conn:
+        return conn.execute(
+            "SELECT (SELECT count(*) FROM commandes), (SELECT count(*) FROM logs), "
+            "(SELECT sum(unites) FROM classements)"
+        ).fetchone()
+
+
+def _batch(tmp_path, operations):
+    chemin = tmp_path / "operations.jsonl"
+    chemin.write_text("\n".join(json.dumps(op) for op in operations) + "\n", encoding="utf-8")
+    return str(chemin)
+
+
+def test_batch_valide(base, tmp_path, capsys):
+    commandes, logs, unites = _compter(base)
+    fichier = _batch(tmp_path, [
+        {"op": "create", "table": "Commande", "data": {"client_id": 1, "produit_id": 2, "nb_produit": 3}},
+        {"op": "delete", "table": "Commande", "filter": "Commande.commande_id == 1"},
+    ])
+
+    assert main.main(["--db", base, "batch", fichier]) == 0
+    assert "2 opérations validées." in capsys.readouterr().out
+    assert _compter(base)[:2] == (commandes, logs + 2)
+
+
+@pytest.mark.parametrize("filtre", [
+    "Commande.nb_produit.op('~~')(1)",   # erreur SQL à l'exécution
+    "Age.age_id == 1",                   # table sans lien avec commandes
+])
+def test_batch_annule_sur_erreur_de_suppression(base, tmp_path, capsys, filtre):
+    avant = _compter(base)
+    fichier = _batch(tmp_path, [
+        {"op": "create", "table": "Commande", "data": {"client_id": 1, "produit_id": 2, "nb_produit": 3}},
+        {"op": "delete", "table": "Commande", "filter": filtre},
+    ])
+
+    assert main.main(["--db", base, "batch", fichier]) == 1
+    sortie = capsys.readouterr()
+    assert "validées" not in sortie.out
+    assert sortie.err.startswith("Erreur")
+    assert _compter(base) == avant
+
+
+def test_lecture_sans_migration(tmp_path, capsys):
+    base = str(tmp_path / "ventes.db")
+    shutil.copy(DB_PATH, base)
+    contenu = open(base, "rb").read()
+
+    assert main.main(["--db", base, "read", "promo"]) == 1
+    assert "migrer" in capsys.readouterr().err
+    assert open(base, "rb").read() == contenu
+
+    assert main.main(["--db", base, "migrer"]) == 0
+    assert main.main(["--db", base, "read", "promo", "--limit", "1"]) == 0
+    assert main.main(["--db", base, "migrer"]) == 0
+    assert "0 tables créées" in capsys.readouterr().out
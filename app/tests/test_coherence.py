@@ -0,0 +1,69 @@
+# import
+import sqlite3
+
+import pytest
+
+from conftest import verifier_contre_reconstruction
+from components.crud import create_commande, create_lignes, delete_filtre, delete_objet, update_table
+from components.models import Age, Client, Commande, Produit, Promotion
+
+
+@pytest.fixture
+def commandes_datees(routeur):
+    """Quelques commandes datées (les commandes fournies n'ont pas de date_commande)."""
+    create_lignes(routeur, Commande, [
+        {"client_id": c, "produit_id": p, "nb_produit": 1 + c % 4, "date_commande": f"2026-0{1 + c % 3}-1{c % 9}T10:00:00"}
+        for c, p in zip(range(1, 60), range(1, 600, 10))
+    ])
+    return routeur
+
+
+def test_commandes(commandes_datees):
+    routeur = commandes_datees
+    create_commande(routeur, 1, 2, 500)
+    update_table(routeur, Commande, 1, nb_produit=40, produit_id=3)
+    update_table(routeur, Commande, 5002, date_commande="2026-05-20T08:30:00")
+    delete_objet(routeur, Commande, 2)
+    delete_filtre(routeur, Commande, Commande.commande_id.in_([3, 4, 5]))
+    verifier_contre_reconstruction(routeur)
+
+
+def test_dimensions_des_commandes(commandes_datees):
+    routeur = commandes_datees
+    update_table(routeur, Client, 1, region_id=3)
+    update_table(routeur, Client, 2, age_id=1)
+    update_table(routeur, Produit, 1, prix=999, genre_cod=5)
+    update_table(routeur, Produit, 11, platform_cod=7)
+    update_table(routeur, Promotion, 1, promotion_percent=50)
+    verifier_contre_reconstruction(routeur)
+
+
+def test_suppressions_de_dimensions(commandes_datees):
+    routeur = commandes_datees
+    delete_objet(routeur, Promotion, 2)
+    delete_objet(routeur, Client, 5)
+    delete_objet(routeur, Produit, 21)
+    delete_filtre(routeur, Client, Client.client_id.in_([6, 7]))
+    verifier_contre_reconstruction(routeur)
+
+
+def test_suppression_filtree_sur_une_table_liee(commandes_datees):
+    routeur = commandes_datees
+    delete_filtre(routeur, Commande, Client.region_id == 1)
+    with sqlite3.connect(routeur.db_path) as conn:
+        restantes = conn.execute("SELECT count(*) FROM commandes JOIN clients USING (client_id) "
+                                 "WHERE clients.region_id = 1").fetchone()[0]
+    assert restantes == 0
+    verifier_contre_reconstruction(routeur)
+
+
+def test_suppression_en_echec_annulee(commandes_datees):
+    routeur = commandes_datees
+    with sqlite3.connect(routeur.db_path) as conn:
+        avant = conn.execute("SELECT count(*), (SELECT sum(unites) FROM classements) FROM commandes").fetchone()
+    with pytest.raises(ValueError):
+        delete_filtre(routeur, Commande, Age.age_id == 1)
+    with sqlite3.connect(routeur.db_path) as conn:
+        apres = conn.execute("SELECT count(*), (SELECT sum(unites) FROM classements) FROM commandes").fetchone()
+    assert apres == avant
+    verifier_contre_reconstruction(routeur)
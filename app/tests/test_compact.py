@@ -0,0 +1,25 @@
+# import
+import numpy as np
+
+from components.crud import read_command, read_produit, update_table
+from components.models import Commande
+
+
+def test_compact_valeurs_derivees(routeur):
+    """Les calculs sur un DataFrame compacté donnent les mêmes résultats qu'au format par défaut."""
+    update_table(routeur, Commande, 1, nb_produit=500)
+
+    defaut = read_command(routeur)
+    compact = read_command(routeur, compact=True)
+
+    # produits de mesures (quantité x prix) et différences, y compris négatives
+    assert np.array_equal((compact.nb_produit * compact.prix).to_numpy(), (defaut.nb_produit * defaut.prix).to_numpy())
+    for colonne_a, colonne_b in (("nb_produit", "prix"), ("client_id", "commande_id")):
+        attendu = defaut[colonne_a] - defaut[colonne_b]
+        assert np.array_equal((compact[colonne_a] - compact[colonne_b]).to_numpy(), attendu.to_numpy())
+    assert np.allclose(compact["prix total"], defaut["prix total"], rtol=1e-6)
+
+
+def test_compact_sans_entiers_non_signes(routeur):
+    for df in (read_command(routeur, compact=True), read_produit(routeur, compact=True)):
+        assert not any(dtype.kind == "u" for dtype in df.dtypes)
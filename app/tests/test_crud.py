@@ -0,0 +1,12 @@
+# import
+from components.crud import read_command
+from components.models import Promotion
+
+
+def test_read_command_filtre_promotion(routeur):
+    """Un filtre sur la promotion ne multiplie pas les lignes (jointure sur la clé primaire)."""
+    toutes = read_command(routeur)
+    filtrees = read_command(routeur, filter_exp=Promotion.promotion_percent > 10)
+    assert len(filtrees) <= len(toutes)
+    assert filtrees["commande_id"].is_unique
+    assert (filtrees["promotion_percent"] > 10).all()
@@ -0,0 +1,44 @@
+# import
+import shutil
+import sqlite3
+
+from conftest import DB_PATH
+from components.crud import create_client, read_table
+from components.models import VERSION_SCHEMA, Age
+from components.routeur import RouteurSessions
+
+
+def test_ouverture_et_lecture_sans_ecriture(tmp_path):
+    chemin = tmp_path / "ventes.db"
+    shutil.copy(DB_PATH, chemin)
+    contenu = chemin.read_bytes()
+
+    routeur = RouteurSessions(str(chemin))
+    try:
+        assert len(read_table(routeur, Age)) > 0
+        assert not routeur.schema_a_jour()
+    finally:
+        routeur.dispose()
+    assert chemin.read_bytes() == contenu
+
+
+def test_premiere_ecriture_migre_une_fois(tmp_path):
+    chemin = tmp_path / "ventes.db"
+    shutil.copy(DB_PATH, chemin)
+
+    routeur = RouteurSessions(str(chemin))
+    try:
+        create_client(routeur, 1, 1)
+        assert routeur.schema_a_jour()
+    finally:
+        routeur.dispose()
+    with sqlite3.connect(chemin) as conn:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == VERSION_SCHEMA
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("SELECT sum(unites) FROM classements").fetchone()[0] > 0
+
+    routeur = RouteurSessions(str(chemin))
+    try:
+        assert routeur.migrer() == []
+    finally:
+        routeur.dispose()
@@ -0,0 +1,34 @@
+# import
+import os
+
+import pytest
+
+from components.sauvegarde import restaurer, sauvegarder
+
+
+def test_restauration_sans_checksum(routeur, tmp_path):
+    copie = str(tmp_path / "sauvegarde.db")
+    sauvegarder(routeur, copie)
+    os.remove(copie + ".sha256")
+
+    with pytest.raises(FileNotFoundError):
+        restaurer(copie, routeur)
+    assert restaurer(copie, routeur, verifier=False)["sha256"] is None
+
+
+def test_restauration_checksum_invalide(routeur, tmp_path):
+    copie = str(tmp_path / "sauvegarde.db")
+    sauvegarder(routeur, copie)
+    with open(copie, "ab") as f:
+        f.write(b"x")
+
+    with pytest.raises(ValueError):
+        restaurer(copie, routeur)
+
+
+def test_sauvegarde_source_absente(tmp_path):
+    source = tmp_path / "absente.db"
+    with pytest.raises(FileNotFoundError):
+        sauvegarder(str(source), str(tmp_path / "sauvegarde.db"))
+    assert not source.exists()
+    assert not (tmp_path / "sauvegarde.db").exists()
@@ -0,0 +1,47 @@
+# import
+import numpy as np
+from sqlalchemy import select
+
+from components.crud import read_command
+from components.models import Promotion
+from components.tarification import MoteurPrix
+
+
+def test_tarifer_commandes_ids(routeur):
+    """La tarification par IDs donne les mêmes totaux que `read_command`, dans l'ordre demandé."""
+    attendu = read_command(routeur).set_index("commande_id")["prix total"]
+    ids = [5000, 3, 1201, 999999, 3, 42]
+
+    with routeur.lecture() as session:
+        moteur = MoteurPrix.charger(session, produits=False, clients=False)
+        tarifs = moteur.tarifer_commandes_ids(session, ids)
+
+    assert tarifs["commande_id"].tolist() == [5000, 3, 1201, 42]
+    assert np.allclose(tarifs["prix_total"], attendu.loc[tarifs["commande_id"]].to_numpy())
+
+    with routeur.lecture() as session:
+        vide = moteur.tarifer_commandes_ids(session, [])
+    assert len(vide["prix_total"]) == 0
+
+
+def test_promotions_hors_des_regions_promues(routeur):
+    """Un client d'une région sans promotion n'hérite pas de la promotion d'un autre produit."""
+    from components.crud import create_commande, create_lignes
+    from components.models import Client, Commande, promotions_regions
+
+    with routeur.ecriture() as session:
+        session.execute(promotions_regions.delete().where(promotions_regions.c.region_id > 2))
+        client_id = 1
+        session.get(Client, client_id).region_id = 4   # "Other" : aucune promotion n'y reste
+        produits = [p for (p,) in session.execute(select(Promotion.produit_id))]
+
+    for produit_id in produits + [p - 1 for p in produits]:
+        create_commande(routeur, client_id, produit_id, 1)
+        create_lignes(routeur, Commande, [{"client_id": client_id, "produit_id": produit_id, "nb_produit": 1}])
+
+    with routeur.lecture() as session:
+        promotions = session.execute(
+            select(Commande.promotion_id).where(Commande.client_id == client_id,
+                                                Commande.produit_id.in_(produits + [p - 1 for p in produits]))
+        ).scalars().all()
+    assert promotions == [None] * len(promotions)
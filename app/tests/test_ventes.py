@@ -0,0 +1,71 @@
+# import
+from datetime import date
+
+import pytest
+
+from components.classement import lignes_commandes
+from components.crud import create_lignes, update_table
+from components.models import Commande
+from components.ventes import _decouper, ventes_periode
+
+
+@pytest.mark.parametrize("debut, fin, mois, plages", [
+    (date(2026, 1, 15), date(2026, 3, 31), ["2026-02", "2026-03"], [("2026-01-15", "2026-01-31")]),
+    (date(2026, 2, 1), date(2026, 4, 10), ["2026-02", "2026-03"], [("2026-04-01", "2026-04-10")]),
+    (date(2026, 3, 5), date(2026, 3, 20), [], [("2026-03-05", "2026-03-20")]),
+    (date(2025, 12, 31), date(2026, 1, 1), [], [("2025-12-31", "2025-12-31"), ("2026-01-01", "2026-01-01")]),
+    (date(2024, 2, 1), date(2024, 2, 29), ["2024-02"], []),
+    (date(2026, 3, 2), date(2026, 3, 1), [], []),
+])
+def test_decouper(debut, fin, mois, plages):
+    assert _decouper(debut, fin) == (mois, plages)
+
+
+@pytest.fixture
+def commandes_datees(routeur):
+    """Commandes réparties sur janvier-avril 2026, à cheval sur les fins de mois."""
+    jours = ["2026-01-14", "2026-01-15", "2026-01-31", "2026-02-01", "2026-02-28",
+             "2026-03-01", "2026-03-31", "2026-04-01", "2026-04-10", "2026-04-11"]
+    create_lignes(routeur, Commande, [
+        {"client_id": c, "produit_id": 10 * c + 1, "nb_produit": 1 + c % 5, "date_commande": f"{jour}T12:00:00"}
+        for c, jour in enumerate(jours * 3, 1)
+    ])
+    return routeur
+
+
+@pytest.mark.parametrize("debut, fin", [
+    (date(2026, 1, 15), date(2026, 3, 31)),   # jours de janvier + deux mois entiers
+    (date(2026, 2, 1), date(2026, 4, 10)),    # mois entiers + jours d'avril
+    (date(2026, 3, 1), date(2026, 3, 1)),
+])
+def test_ventes_periode_contre_les_commandes(commandes_datees, debut, fin):
+    routeur = commandes_datees
+    with routeur.lecture() as session:
+        ids = session.query(Commande.commande_id).filter(Commande.date_commande.isnot(None)).all()
+        lignes = [l for l in lignes_commandes(session, [i for (i,) in ids])
+                  if debut <= l.date_commande.date() <= fin]
+    attendu = {}
+    for l in lignes:
+        unites, revenu = attendu.get(l.region, (0, 0.0))
+        attendu[l.region] = (unites + l.nb_produit, revenu + l.revenu)
+
+    df = ventes_periode(routeur, debut, fin, par="region")
+    assert {int(r): int(u) for r, u in df["unites"].items()} == {r: u for r, (u, _) in attendu.items()}
+    for region, (_, revenu) in attendu.items():
+        assert df.loc[region, "revenu"] == pytest.approx(revenu)
+
+
+def test_date_avec_fuseau_convertie_en_utc(routeur):
+    # 23:30 à UTC-2 le 31 mars = 01:30 UTC le 1er avril
+    create_lignes(routeur, Commande, [{"client_id": 1, "produit_id": 2, "nb_produit": 7,
+                                       "date_commande": "2026-03-31T23:30:00-02:00"}])
+    with routeur.lecture() as session:
+        commande = session.query(Commande).filter(Commande.nb_produit == 7,
+                                                  Commande.date_commande.isnot(None)).one()
+    assert commande.date_commande.isoformat() == "2026-04-01T01:30:00"
+    assert ventes_periode(routeur, date(2026, 4, 1), date(2026, 4, 30), par=None)["unites"].sum() == 7
+    assert ventes_periode(routeur, date(2026, 3, 1), date(2026, 3, 31), par=None)["unites"].sum() == 0
+
+    update_table(routeur, Commande, commande.commande_id, date_commande="2026-04-30T23:00:00-05:00")
+    assert ventes_periode(routeur, date(2026, 4, 1), date(2026, 4, 30), par=None)["unites"].sum() == 0
+    assert ventes_periode(routeur, date(2026, 5, 1), date(2026, 5, 1), par=None)["unites"].sum() == 7